@@ -0,0 +1,164 @@
+"""Compare the time taken to load all of the projects from the plan CSVs with
+loading them from the columnar export. The projects are downloaded from a
+local stand-in for the HPC API serving synthetic plans. Loading the CSVs
+includes splitting the list columns and converting currentRequestedFunds to
+a number so that both give the same typed data.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_columnar --plans 50
+"""
+
+import argparse
+import csv
+import logging
+import time
+from os import walk
+from os.path import getsize, join
+
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from hdx.api.utilities.hdx_error_handler import HDXErrorHandler
+from hdx.utilities.downloader import Download
+from hdx.utilities.path import temp_dir
+from hdx.utilities.retriever import Retrieve
+
+from benchmarks.common import setup_configuration, setup_offline_lookups
+from benchmarks.hpc_server import HPCServer
+
+from hdx.scraper.hrp_projects.columnar import ProjectsDataset
+from hdx.scraper.hrp_projects.hrp_projects import HRPProjects
+
+_LIST_COLUMNS = ("locations", "globalClusters", "organizations", "plans")
+
+
+def load_csvs(paths):
+    """Load CSVs into typed columns the way a user of the CSVs would"""
+    columns = {}
+    for path in paths:
+        with open(path, encoding="utf-8-sig", newline="") as file:
+            reader = csv.reader(file)
+            headers = next(reader)
+            for header in headers:
+                columns.setdefault(header, [])
+            lists = [header in _LIST_COLUMNS for header in headers]
+            for row in reader:
+                for header, is_list, value in zip(headers, lists, row):
+                    if is_list:
+                        value = value.split(", ") if value else None
+                    elif header == "currentRequestedFunds":
+                        value = float(value) if value else None
+                    columns[header].append(value)
+    return columns
+
+
+def load_arrow_csvs(paths):
+    """Load CSVs with pyarrow keeping the list columns joined"""
+    return [pacsv.read_csv(path) for path in paths]
+
+
+def get_folder_size(folder):
+    return sum(
+        getsize(join(root, filename))
+        for root, _, filenames in walk(folder)
+        for filename in filenames
+    )
+
+
+def measure(function, *args, repeats=5):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(*args)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plans", type=int, default=20)
+    parser.add_argument("--max-projects", type=int, default=5000)
+    parser.add_argument("--year", type=int, default=2022)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    with HPCServer(
+        plans=args.plans,
+        max_projects=args.max_projects,
+        page_size=1000,
+        year=args.year,
+        seed=args.seed,
+    ) as server:
+        configuration = setup_configuration(**server.get_configuration_overrides())
+        setup_offline_lookups(configuration)
+        with HDXErrorHandler() as error_handler:
+            with temp_dir("bench_columnar") as tempdir:
+                with Download(user_agent="benchmark") as downloader:
+                    retriever = Retrieve(
+                        downloader,
+                        fallback_dir=tempdir,
+                        saved_dir=tempdir,
+                        temp_dir=tempdir,
+                        save=False,
+                        use_saved=False,
+                    )
+                    folder = join(tempdir, "projects_parquet")
+                    hrp_projects = HRPProjects(
+                        configuration,
+                        retriever,
+                        error_handler,
+                        tempdir,
+                        projects_dataset=ProjectsDataset(
+                            folder, configuration["headers"]
+                        ),
+                    )
+                    hrp_projects.get_data(args.year, args.year - 4)
+                paths = sorted(
+                    {
+                        plan.csv_path
+                        for country in hrp_projects.countries.values()
+                        for plan in country.plans
+                    }
+                )
+                rows = len(load_csvs(paths)["name"])
+                csv_size = sum(getsize(path) for path in paths)
+                parquet_size = get_folder_size(folder)
+                print(
+                    f"{len(paths)} plans with {rows} projects: "
+                    f"CSVs {csv_size / 1000000:.1f} MB, "
+                    f"Parquet {parquet_size / 1000000:.1f} MB"
+                )
+                results = {
+                    "csv module (typed)": measure(
+                        load_csvs, paths, repeats=args.repeats
+                    ),
+                    "pyarrow.csv (untyped lists)": measure(
+                        load_arrow_csvs, paths, repeats=args.repeats
+                    ),
+                    "parquet dataset": measure(
+                        pq.read_table, folder, repeats=args.repeats
+                    ),
+                    "parquet 3 columns": measure(
+                        lambda: pq.read_table(
+                            folder,
+                            columns=[
+                                "versionCode",
+                                "currentRequestedFunds",
+                                "plan_code",
+                            ],
+                        ),
+                        repeats=args.repeats,
+                    ),
+                }
+    baseline = results["csv module (typed)"]
+    for name, seconds in results.items():
+        print(
+            f"{name}: {seconds * 1000:.1f}ms ({baseline / seconds:.1f}x), "
+            f"{rows / seconds:.0f} rows/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
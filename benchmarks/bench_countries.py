@@ -0,0 +1,72 @@
+"""Measure country lookups over the full countries table of
+hdx-python-country (about 250 countries), comparing scanning the table for
+the HRP and GHO checks and looking up each country name with using the
+country metadata index, built in the run or loaded from disk.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_countries
+"""
+
+import argparse
+import time
+from os.path import join
+
+from hdx.location.country import Country
+from hdx.utilities.path import temp_dir
+
+from benchmarks.common import setup_configuration, setup_offline_lookups
+
+from hdx.scraper.hrp_projects.countries import CountryMetadata
+
+
+def scan_table(iso3s):
+    """Look up countries the way the scraper originally did"""
+    country_data = Country.countriesdata()["countries"]
+    header_lookup = {"GHO": "In GHO", "HRP": "Has HRP"}
+    for data_type in ("GHO", "HRP"):
+        {
+            key
+            for key in country_data
+            if country_data[key][header_lookup[data_type]] == "Y"
+        }
+    for iso3 in iso3s:
+        Country.get_country_name_from_iso3(iso3)
+
+
+def use_index(country_metadata, iso3s):
+    for data_type in ("GHO", "HRP"):
+        country_metadata.flagged[data_type]
+    for iso3 in iso3s:
+        country_metadata.get_name(iso3)
+
+
+def measure(function, *args, repeats=100):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function(*args)
+    return (time.perf_counter() - start) / repeats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=100)
+    args = parser.parse_args()
+    setup_offline_lookups(setup_configuration())
+    iso3s = sorted(Country.countriesdata()["countries"])
+    print(f"{len(iso3s)} countries")
+    with temp_dir("bench_countries") as tempdir:
+        path = join(tempdir, "countries.json")
+        build = measure(CountryMetadata.from_country, repeats=args.repeats)
+        country_metadata = CountryMetadata.from_country()
+        country_metadata.save(path)
+        load = measure(CountryMetadata.load, path, repeats=args.repeats)
+    scan = measure(scan_table, iso3s, repeats=args.repeats)
+    lookup = measure(use_index, country_metadata, iso3s, repeats=args.repeats)
+    print(f"scan table per run: {scan * 1000:.3f}ms")
+    print(f"index lookups: {lookup * 1000:.3f}ms ({scan / lookup:.0f}x)")
+    print(f"build index: {build * 1000:.3f}ms, load index: {load * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
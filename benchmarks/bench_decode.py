@@ -0,0 +1,71 @@
+"""Compare decode time and peak allocation of Retrieve.download_json and
+JSONRetrieve.download_json on the RSYR22 project search fixtures.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_decode
+"""
+
+import argparse
+import logging
+import time
+import tracemalloc
+
+from hdx.utilities.downloader import Download
+from hdx.utilities.path import temp_dir
+from hdx.utilities.retriever import Retrieve
+
+from benchmarks.common import input_dir, setup_configuration
+
+from hdx.scraper.hrp_projects import decode
+from hdx.scraper.hrp_projects.decode import JSONRetrieve
+
+
+def get_urls(configuration):
+    url = configuration["api_pattern"].format(code="RSYR22", rows=500)
+    return [url] + [f"{url}&page={i}" for i in range(2, 9)]
+
+
+def measure(retriever, urls, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for url in urls:
+            retriever.download_json(url)
+    elapsed = (time.perf_counter() - start) / repeats
+    peak = 0
+    for url in urls:
+        tracemalloc.start()
+        retriever.download_json(url)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    urls = get_urls(setup_configuration())
+    print(f"JSONRetrieve decoder: {'orjson' if decode.orjson else 'json'}")
+    with temp_dir("bench_decode") as tempdir:
+        with Download(user_agent="benchmark") as downloader:
+            for retriever_class in (Retrieve, JSONRetrieve):
+                retriever = retriever_class(
+                    downloader,
+                    fallback_dir=tempdir,
+                    saved_dir=input_dir,
+                    temp_dir=tempdir,
+                    save=False,
+                    use_saved=True,
+                )
+                elapsed, peak = measure(retriever, urls, args.repeats)
+                print(
+                    f"{retriever_class.__name__}: {elapsed * 1000:.1f} ms for "
+                    f"{len(urls)} pages, peak allocation {peak / 1000000:.1f} MB "
+                    f"per page"
+                )
+
+
+if __name__ == "__main__":
+    main()
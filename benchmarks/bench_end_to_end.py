@@ -0,0 +1,180 @@
+"""Run get_data and generate_dataset end to end against a local stand-in for
+the HPC API serving synthetic plans and projects generated from the fixtures,
+and report throughput, latency percentiles and memory use. Each mode is run
+in turn to compare downloading each plan on its own with batching small plans
+and adapting the page size, checking that the projects are the same. Only
+plans known to be small from the last run are batched, so each mode starts
+from the state of an earlier run in which every plan has since changed.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_end_to_end --plans 50 --latency 0.05
+"""
+
+import argparse
+import json
+import logging
+import time
+from os import makedirs
+from os.path import join
+
+from hdx.api.utilities.hdx_error_handler import HDXErrorHandler
+from hdx.utilities.downloader import Download
+from hdx.utilities.loader import load_json
+from hdx.utilities.path import temp_dir
+from hdx.utilities.retriever import Retrieve
+from hdx.utilities.saver import save_json
+
+from benchmarks.common import setup_configuration, setup_offline_lookups
+from benchmarks.hpc_server import HPCServer
+
+from hdx.scraper.hrp_projects.hrp_projects import HRPProjects
+from hdx.scraper.hrp_projects.state import PlanState
+
+MODES = {
+    "single": {"batch_max_plans": 1, "adaptive_page_size": False},
+    "batched": {"batch_max_plans": 10, "adaptive_page_size": False},
+    "adaptive": {"batch_max_plans": 1, "adaptive_page_size": True},
+    "batched_adaptive": {"batch_max_plans": 10, "adaptive_page_size": True},
+}
+
+
+def run(server: HPCServer, year: int, previous_state: dict = None, **overrides) -> dict:
+    configuration = setup_configuration(
+        **server.get_configuration_overrides(), **overrides
+    )
+    # the local stand-in for the API is not rate limited
+    configuration["fetch"] = {**configuration["fetch"], "requests_per_second": 0}
+    setup_offline_lookups(configuration)
+    with HDXErrorHandler() as error_handler:
+        with temp_dir("bench_end_to_end") as tempdir:
+            state_folder = join(tempdir, "state")
+            if previous_state is not None:
+                makedirs(state_folder)
+                save_json(previous_state, join(state_folder, "state.json"))
+            with Download(user_agent="benchmark") as downloader:
+                retriever = Retrieve(
+                    downloader,
+                    fallback_dir=tempdir,
+                    saved_dir=tempdir,
+                    temp_dir=tempdir,
+                    save=False,
+                    use_saved=False,
+                )
+                hrp_projects = HRPProjects(
+                    configuration,
+                    retriever,
+                    error_handler,
+                    tempdir,
+                    PlanState(state_folder),
+                )
+                start = time.perf_counter()
+                countryiso3s = hrp_projects.get_data(year, year - 4)
+                report = hrp_projects.report
+                for countryiso3 in countryiso3s:
+                    with report.time("generate_dataset", country=countryiso3):
+                        hrp_projects.generate_dataset(countryiso3)
+                elapsed = time.perf_counter() - start
+                hrp_projects.save_state()
+                state = load_json(join(state_folder, "state.json"))
+    result = report.to_dict()
+    rows = result["totals"].get("rows", 0)
+    fingerprints = {
+        plan.code: plan.projects_fingerprint
+        for country in hrp_projects.countries.values()
+        for plan in country.plans
+    }
+    return {
+        "state": state,
+        "fingerprints": fingerprints,
+        "seconds": elapsed,
+        "countries": len(countryiso3s),
+        "rows": rows,
+        "rows_per_second": rows / elapsed,
+        "bytes": result["totals"].get("bytes", 0),
+        "peak_rss": result["peak_rss"],
+        "stages": {
+            stage: {
+                key: stats[key]
+                for key in ("count", "p50_seconds", "p90_seconds", "p99_seconds")
+            }
+            for stage, stats in result["stages"].items()
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plans", type=int, default=20)
+    parser.add_argument("--max-projects", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--row-latency", type=float, default=0.0002)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--year", type=int, default=2022)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--page-size-start", type=int, default=500)
+    parser.add_argument("--target-page-seconds", type=float, default=0.5)
+    parser.add_argument("--output", help="Save results as JSON to this path")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    with HPCServer(
+        plans=args.plans,
+        max_projects=args.max_projects,
+        page_size=args.page_size,
+        latency=args.latency,
+        row_latency=args.row_latency,
+        error_rate=args.error_rate,
+        year=args.year,
+        seed=args.seed,
+    ) as server:
+        print(f"{args.plans} plans with {server.total_projects} projects")
+        # the number of projects of each plan is known from the state of the
+        # earlier run but clearing the fingerprints makes every plan changed
+        previous_state = run(server, args.year)["state"]
+        for plan in previous_state["plans"].values():
+            plan["fingerprint"] = ""
+        results = {}
+        for mode in args.modes:
+            project_search = {
+                **MODES[mode],
+                "page_size": args.page_size_start,
+                "target_page_seconds": args.target_page_seconds,
+            }
+            results[mode] = run(
+                server,
+                args.year,
+                previous_state,
+                max_concurrent_pages=args.max_in_flight,
+                project_search=project_search,
+            )
+    fingerprints = None
+    for mode, result in results.items():
+        if fingerprints is None:
+            fingerprints = result["fingerprints"]
+        elif result["fingerprints"] != fingerprints:
+            print(f"{mode}: projects differ from {args.modes[0]}!")
+        print(
+            f"{mode}: {result['seconds']:.2f}s, {result['countries']} countries, "
+            f"{result['rows']} rows ({result['rows_per_second']:.0f} rows/s), "
+            f"{result['bytes'] / 1000000:.1f} MB downloaded, "
+            f"peak RSS {result['peak_rss'] / 1000000:.0f} MB"
+        )
+        for stage, stats in result["stages"].items():
+            print(
+                f"  {stage}: {stats['count']} calls, "
+                f"p50 {stats['p50_seconds'] * 1000:.1f}ms, "
+                f"p90 {stats['p90_seconds'] * 1000:.1f}ms, "
+                f"p99 {stats['p99_seconds'] * 1000:.1f}ms"
+            )
+        del result["state"]
+        del result["fingerprints"]
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
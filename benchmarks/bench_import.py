@@ -0,0 +1,86 @@
+"""Measure startup cost of the scraper entry point in fresh interpreters,
+comparing the modules now imported at startup and by --check-only with the
+modules the entry point used to import eagerly, including loading the
+countries table.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_import --repeats 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+_EAGER = (
+    "import cProfile, pstats; "
+    "from hdx.api.configuration import Configuration; "
+    "from hdx.api.utilities.hdx_error_handler import HDXErrorHandler; "
+    "from hdx.data.dataset import Dataset; "
+    "from hdx.data.resource import Resource; "
+    "from hdx.data.user import User; "
+    "from hdx.facades.infer_arguments import facade; "
+    "from hdx.location.country import Country; "
+    "from hdx.utilities.downloader import Download; "
+    "from hdx.utilities.retriever import Retrieve; "
+    "import hdx.scraper.hrp_projects.hrp_projects; "
+)
+try:
+    import pyarrow  # noqa: F401
+
+    _EAGER += "import pyarrow.parquet; "
+except ImportError:
+    pass
+
+_STATEMENTS = {
+    "entry point": "import hdx.scraper.hrp_projects.__main__",
+    "check only": (
+        "import hdx.scraper.hrp_projects.__main__; "
+        "from hdx.api.configuration import Configuration; "
+        "from hdx.api.utilities.hdx_error_handler import HDXErrorHandler; "
+        "from hdx.facades.infer_arguments import facade; "
+        "from hdx.utilities.downloader import Download; "
+        "from hdx.scraper.hrp_projects.countries import CountryMetadata; "
+        "import hdx.scraper.hrp_projects.hrp_projects"
+    ),
+    "eager (before)": (
+        f"{_EAGER}Country.countriesdata(use_live=False); "
+        "import hdx.scraper.hrp_projects.__main__"
+    ),
+}
+
+
+def measure(statement: str, repeats: int) -> float:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True, env=env)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+    interpreter = measure("pass", args.repeats)
+    print(f"bare interpreter: {interpreter * 1000:.0f}ms")
+    results = {
+        name: measure(statement, args.repeats)
+        for name, statement in _STATEMENTS.items()
+    }
+    baseline = results["eager (before)"]
+    for name, seconds in results.items():
+        print(
+            f"{name}: {seconds * 1000:.0f}ms "
+            f"({(seconds - interpreter) * 1000:.0f}ms over bare interpreter, "
+            f"{baseline / seconds:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
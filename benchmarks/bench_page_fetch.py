@@ -0,0 +1,67 @@
+"""Compare sequential and concurrent project page fetching by replaying the
+RSYR22 fixtures with a simulated round trip latency.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_page_fetch --latency 0.2
+"""
+
+import argparse
+import logging
+import time
+
+from hdx.api.utilities.hdx_error_handler import HDXErrorHandler
+from hdx.utilities.path import temp_dir
+
+from benchmarks.common import (
+    fixture_retriever,
+    setup_configuration,
+    setup_offline_lookups,
+)
+
+from hdx.scraper.hrp_projects.countries import CountryMetadata
+from hdx.scraper.hrp_projects.hrp_projects import HRPProjects
+
+
+def run(max_in_flight: int, latency: float, country_metadata: CountryMetadata) -> float:
+    configuration = setup_configuration(max_concurrent_pages=max_in_flight)
+    # the fixtures are replayed without rate limiting the requests
+    configuration["fetch"] = {**configuration["fetch"], "requests_per_second": 0}
+    with HDXErrorHandler() as error_handler:
+        with temp_dir("bench_page_fetch") as tempdir:
+            retriever = fixture_retriever(tempdir, latency)
+            hrp_projects = HRPProjects(
+                configuration,
+                retriever,
+                error_handler,
+                tempdir,
+                country_metadata=country_metadata,
+            )
+            start = time.perf_counter()
+            hrp_projects.get_data(2022, 2018)
+            return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--max-in-flight", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    # the countries table is loaded once before timing so that it is not
+    # charged to whichever configuration runs first
+    setup_offline_lookups(setup_configuration())
+    country_metadata = CountryMetadata.from_country()
+    baseline = None
+    for max_in_flight in args.max_in_flight:
+        elapsed = run(max_in_flight, args.latency, country_metadata)
+        if baseline is None:
+            baseline = elapsed
+        print(
+            f"max_in_flight={max_in_flight}: {elapsed:.2f}s "
+            f"(speedup {baseline / elapsed:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
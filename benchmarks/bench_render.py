@@ -0,0 +1,84 @@
+"""Compare rendering project pages as CSV in the calling threads with
+rendering them in a pool of processes. Several threads render pages at the
+same time as the plan download workers do, each submitting all of the pages
+of a plan before waiting for them. The CPU time used by the calling
+process shows how much of the work a pool takes off the process running the
+downloads, which is what bounds the speed up on a machine with enough
+cores. The RSYR22 fixture pages are
+repeated to make up the pages of each plan.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_render --plans 8 --processes 0 2 4
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
+from os.path import join
+
+from hdx.utilities.loader import load_json
+
+from benchmarks.common import input_dir, setup_configuration
+
+from hdx.scraper.hrp_projects.render import CSVRenderer
+
+
+def load_pages():
+    pattern = join(input_dir, "project-search-plancodes-rsyr22-*.json")
+    return [load_json(path)["data"]["results"] for path in sorted(glob(pattern))]
+
+
+def run(headers, pages, plans, threads, processes) -> float:
+    def render_plan(renderer, plan_number):
+        plan_code = f"SYN{plan_number:03d}22"
+        futures = [renderer.submit(plan_code, page) for page in pages]
+        return sum(len(future.result()) for future in futures)
+
+    with CSVRenderer(headers, processes) as renderer:
+        # start all of the worker processes before timing
+        with ThreadPoolExecutor(max_workers=max(1, processes)) as executor:
+            list(
+                executor.map(
+                    lambda _: renderer.render("RSYR22", pages[0]),
+                    range(max(1, processes) * 2),
+                )
+            )
+        start = time.perf_counter()
+        start_cpu = time.process_time()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            sizes = list(executor.map(lambda i: render_plan(renderer, i), range(plans)))
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - start_cpu
+    return elapsed, cpu, sum(sizes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plans", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--processes", type=int, nargs="+", default=[0, 2, 4])
+    args = parser.parse_args()
+    headers = setup_configuration()["headers"]
+    pages = load_pages()
+    rows = sum(len(page) for page in pages) * args.plans
+    print(f"{rows} rows in {args.plans} plans on {os.cpu_count()} CPUs")
+    baseline = None
+    size = None
+    for processes in args.processes:
+        elapsed, cpu, total = run(headers, pages, args.plans, args.threads, processes)
+        if size is None:
+            size = total
+        elif total != size:
+            print(f"{processes} processes: output differs!")
+        baseline = baseline or elapsed
+        print(
+            f"{processes} processes: {elapsed:.3f}s, {rows / elapsed:.0f} rows/s "
+            f"({baseline / elapsed:.1f}x), {cpu:.3f}s CPU in this process"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Measure row flattening throughput over the eight RSYR22 fixture pages,
+comparing the compiled RowTransformer with flattening through a dict per row.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_transform
+"""
+
+import argparse
+import time
+from glob import glob
+from os.path import join
+
+from hdx.utilities.loader import load_json
+
+from benchmarks.common import input_dir, setup_configuration
+
+from hdx.scraper.hrp_projects.transform import RowTransformer
+
+
+def dict_flatten(headers, plan_code, project_data):
+    """Flatten rows the way the scraper originally did"""
+    for row in project_data:
+        csv_row = {key: value for key, value in row.items() if key in headers}
+        if row["locations"] is not None:
+            csv_row["locations"] = ", ".join(
+                [country["iso3"] for country in row["locations"] if country["iso3"]]
+            )
+        if row["globalClusters"] is not None:
+            csv_row["globalClusters"] = ", ".join(
+                [cluster["name"] for cluster in row["globalClusters"]]
+            )
+        if row["organizations"] is not None:
+            csv_row["organizations"] = ", ".join(
+                [org["name"] for org in row["organizations"]]
+            )
+        if row["plans"] is not None:
+            plan_names = list(set([plan["name"] for plan in row["plans"]]))
+            csv_row["plans"] = ", ".join(plan_names)
+        csv_row["Response plan code"] = plan_code
+        yield [csv_row.get(header) for header in headers]
+
+
+def load_rows():
+    rows = []
+    pattern = join(input_dir, "project-search-plancodes-rsyr22-*.json")
+    for path in sorted(glob(pattern)):
+        rows.extend(load_json(path)["data"]["results"])
+    return rows
+
+
+def measure(function, rows, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for _ in function(rows):
+            pass
+    return len(rows) * repeats / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+    headers = setup_configuration()["headers"]
+    rows = load_rows()
+    transformer = RowTransformer(headers)
+    results = {
+        "dict per row": measure(
+            lambda rows: dict_flatten(headers, "RSYR22", rows), rows, args.repeats
+        ),
+        "RowTransformer": measure(
+            lambda rows: transformer.transform("RSYR22", rows), rows, args.repeats
+        ),
+    }
+    print(f"{len(rows)} rows x {args.repeats} repeats")
+    for name, rows_per_second in results.items():
+        print(f"{name}: {rows_per_second:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
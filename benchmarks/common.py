@@ -0,0 +1,122 @@
+"""Helpers shared by the benchmarks"""
+
+import time
+from os.path import join
+from typing import Any
+
+from hdx.api.configuration import Configuration
+from hdx.api.locations import Locations
+from hdx.data.resource import Resource
+from hdx.data.vocabulary import Vocabulary
+from hdx.location.country import Country
+from hdx.utilities.downloader import Download
+from hdx.utilities.useragent import UserAgent
+
+from hdx.scraper.hrp_projects.decode import JSONRetrieve
+
+fixtures_dir = join("tests", "fixtures")
+input_dir = join(fixtures_dir, "input")
+config_dir = join("src", "hdx", "scraper", "hrp_projects", "config")
+
+
+def setup_configuration(**overrides: Any) -> Configuration:
+    """Create a read only HDX configuration using the project configuration,
+    optionally overriding some of its values.
+
+    Args:
+        **overrides: Project configuration values to override
+
+    Returns:
+        Configuration: HDX configuration
+    """
+    UserAgent.set_global("benchmark")
+    Configuration._create(
+        hdx_read_only=True,
+        hdx_site="prod",
+        project_config_yaml=join(config_dir, "project_configuration.yaml"),
+    )
+    configuration = Configuration.read()
+    configuration.update(overrides)
+    return configuration
+
+
+def setup_offline_lookups(configuration: Configuration) -> None:
+    """Set up the HDX tags, locations, formats and country lookups used when
+    generating datasets so that they are not downloaded.
+
+    Args:
+        configuration (Configuration): HDX configuration
+
+    Returns:
+        None
+    """
+    Country.set_use_live_default(False)
+    tags = configuration["tags"]
+    Vocabulary.set_tagsdict(
+        {tag: {"Action to Take": "ok", "New Tag(s)": None} for tag in tags}
+    )
+    Vocabulary._approved_vocabulary = {
+        "tags": [{"name": tag} for tag in tags],
+        "id": "b891512e-9516-4bf5-962a-7a289772a2a1",
+        "name": "approved",
+    }
+    Locations.set_validlocations(
+        [
+            {"name": iso3.lower(), "title": Country.get_country_name_from_iso3(iso3)}
+            for iso3 in Country.countriesdata()["countries"]
+        ]
+    )
+    Resource.set_formatsdict({"csv": "csv", "json": "json"})
+
+
+class LatencyRetrieve(JSONRetrieve):
+    """Retrieve that replays saved fixtures, sleeping for a fixed time before
+    returning each one to simulate a network round trip.
+
+    Args:
+        latency (float): Seconds to sleep per request
+        *args: Arguments to pass to JSONRetrieve
+        **kwargs: Keyword arguments to pass to JSONRetrieve
+    """
+
+    def __init__(self, latency: float, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.latency = latency
+
+    def clone(self, downloader: Download) -> "LatencyRetrieve":
+        return LatencyRetrieve(
+            self.latency,
+            downloader,
+            fallback_dir=self.fallback_dir,
+            saved_dir=self.saved_dir,
+            temp_dir=self.temp_dir,
+            save=self.save,
+            use_saved=self.use_saved,
+            prefix=self.prefix,
+            delete=False,
+        )
+
+    def download_json(self, url: str, *args: Any, **kwargs: Any) -> Any:
+        time.sleep(self.latency)
+        return super().download_json(url, *args, **kwargs)
+
+
+def fixture_retriever(tempdir: str, latency: float = 0.0) -> LatencyRetrieve:
+    """Retriever that replays the saved test fixtures.
+
+    Args:
+        tempdir (str): Temporary directory
+        latency (float): Seconds to sleep per request. Defaults to 0.
+
+    Returns:
+        LatencyRetrieve: Retriever using the test fixtures
+    """
+    return LatencyRetrieve(
+        latency,
+        Download(user_agent="benchmark"),
+        fallback_dir=tempdir,
+        saved_dir=input_dir,
+        temp_dir=tempdir,
+        save=False,
+        use_saved=True,
+    )
@@ -0,0 +1,300 @@
+"""Local stand-in for the HPC API serving synthetic plans and projects
+generated from the test fixtures. It serves /v2/public/plan and paginated
+/v2/public/project/search (including several comma separated planCodes) with
+configurable latency (fixed and per project), maximum page size and error
+rate.
+
+It is started by the end to end benchmark but can also be run on its own:
+
+    python -m benchmarks.hpc_server --port 8000 --plans 50
+"""
+
+import argparse
+import copy
+import json
+import multiprocessing
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from math import ceil
+from os.path import join
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.common import input_dir
+
+_TEMPLATE_PLAN = "RSYR22"
+_PROJECT_FILES = (
+    "project-search-plancodes-rsyr22-excludefields-governingentities-targets-limit-500.json",
+    *(
+        f"project-search-plancodes-rsyr22-excludefields-governingentities-targets-limit-500-page-{page}.json"
+        for page in range(2, 9)
+    ),
+)
+
+
+def _load_fixture(filename: str) -> Dict:
+    with open(join(input_dir, filename), encoding="utf-8") as file:
+        return json.load(file)
+
+
+class SyntheticData:
+    """Plans and projects generated from the fixtures. Each synthetic plan is
+    a copy of the RSYR22 plan in the given year with 1 to 3 countries taken
+    from the fixture plans. Plan sizes are skewed so most plans are small
+    and a few are close to max_projects. Projects are copies of the RSYR22
+    projects with new ids and plan codes.
+
+    Args:
+        plans (int): Number of plans. Defaults to 20.
+        max_projects (int): Maximum number of projects in a plan. Defaults to 2000.
+        year (int): Year of plans. Defaults to 2022.
+        seed (int): Random seed. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        plans: int = 20,
+        max_projects: int = 2000,
+        year: int = 2022,
+        seed: int = 0,
+    ):
+        rng = random.Random(seed)
+        fixture_plans = _load_fixture("public-plan.json")["data"]
+        template = next(
+            plan
+            for plan in fixture_plans
+            if plan["planVersion"]["code"] == _TEMPLATE_PLAN
+        )
+        countries = {}
+        for plan in fixture_plans:
+            for location in plan["locations"]:
+                if location.get("adminLevel") == 0 and location.get("iso3"):
+                    countries[location["iso3"]] = location
+        countries = [countries[iso3] for iso3 in sorted(countries)]
+        template_projects = []
+        for filename in _PROJECT_FILES:
+            template_projects.extend(_load_fixture(filename)["data"]["results"])
+
+        self.plans: List[Dict] = []
+        self.projects: Dict[str, List[Dict]] = {}
+        project_id = 1
+        for i in range(plans):
+            code = f"SYN{i:03d}{year % 100:02d}"
+            name = f"Synthetic Response Plan {i} {year}"
+            plan = copy.deepcopy(template)
+            plan["id"] = 100000 + i
+            plan["planVersion"]["id"] = 200000 + i
+            plan["planVersion"]["code"] = code
+            plan["planVersion"]["name"] = name
+            plan["planVersion"]["startDate"] = f"{year}-01-01"
+            plan["planVersion"]["endDate"] = f"{year}-12-31"
+            plan["years"] = [{"year": str(year)}]
+            plan["locations"] = rng.sample(countries, rng.randint(1, 3))
+            self.plans.append(plan)
+
+            projects = []
+            for _ in range(int(max_projects * rng.random() ** 3)):
+                project = template_projects[project_id % len(template_projects)]
+                projects.append(
+                    {
+                        **project,
+                        "id": project_id,
+                        "versionCode": f"{code}-{project_id}-1",
+                        "plans": [
+                            {**entry, "id": plan["id"], "code": code, "name": name}
+                            for entry in project["plans"]
+                        ],
+                    }
+                )
+                project_id += 1
+            self.projects[code] = projects
+
+    @property
+    def total_projects(self) -> int:
+        return sum(len(projects) for projects in self.projects.values())
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        server = self.server
+        time.sleep(server.latency)
+        url = urlsplit(self.path)
+        if url.path == "/v2/public/plan":
+            self._send(200, server.plans_body)
+            return
+        if url.path != "/v2/public/project/search":
+            self._send(404, b'{"status": "not found"}')
+            return
+        if server.error_rate and server.rng.random() < server.error_rate:
+            self._send(503, b'{"status": "unavailable"}')
+            return
+        query = parse_qs(url.query)
+        results = []
+        for codes in query.get("planCodes", []):
+            for code in codes.split(","):
+                results.extend(server.data.projects.get(code.upper(), ()))
+        limit = min(int(query.get("limit", ["100"])[0]), server.page_size)
+        page = int(query.get("page", ["1"])[0])
+        start = (page - 1) * limit
+        page_results = results[start : start + limit]
+        time.sleep(server.row_latency * len(page_results))
+        body = {
+            "data": {
+                "results": page_results,
+                "pagination": {
+                    "count": len(page_results),
+                    "total": len(results),
+                    "limit": limit,
+                    "currentPage": page,
+                    "pages": ceil(len(results) / limit),
+                },
+            },
+            "status": "ok",
+        }
+        self._send(200, json.dumps(body).encode())
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int,
+        data: SyntheticData,
+        latency: float,
+        row_latency: float,
+        page_size: int,
+        error_rate: float,
+        seed: int,
+    ):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.data = data
+        self.latency = latency
+        self.row_latency = row_latency
+        self.page_size = page_size
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.plans_body = json.dumps({"data": data.plans, "status": "ok"}).encode()
+
+
+def _serve(connection: Any, port: int, kwargs: Dict) -> None:
+    data = SyntheticData(
+        kwargs["plans"], kwargs["max_projects"], kwargs["year"], kwargs["seed"]
+    )
+    server = _Server(
+        port,
+        data,
+        kwargs["latency"],
+        kwargs["row_latency"],
+        kwargs["page_size"],
+        kwargs["error_rate"],
+        kwargs["seed"],
+    )
+    if connection is not None:
+        connection.send((server.server_address[1], data.total_projects))
+        connection.close()
+    server.serve_forever()
+
+
+class HPCServer:
+    """Run the HPC API stand-in in a separate process so that it does not
+    compete with the scraper for the GIL or add to its memory use.
+
+    Args:
+        plans (int): Number of plans. Defaults to 20.
+        max_projects (int): Maximum number of projects in a plan. Defaults to 2000.
+        page_size (int): Maximum number of projects per page. Defaults to 100.
+        latency (float): Seconds to wait before each response. Defaults to 0.
+        row_latency (float): Extra seconds to wait per project in a page. Defaults to 0.
+        error_rate (float): Fraction of project searches that fail with 503. Defaults to 0.
+        year (int): Year of plans. Defaults to 2022.
+        seed (int): Random seed. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        plans: int = 20,
+        max_projects: int = 2000,
+        page_size: int = 100,
+        latency: float = 0.0,
+        row_latency: float = 0.0,
+        error_rate: float = 0.0,
+        year: int = 2022,
+        seed: int = 0,
+    ):
+        self._kwargs = {
+            "plans": plans,
+            "max_projects": max_projects,
+            "page_size": page_size,
+            "latency": latency,
+            "row_latency": row_latency,
+            "error_rate": error_rate,
+            "year": year,
+            "seed": seed,
+        }
+        self._process: Optional[multiprocessing.Process] = None
+        self.url = None
+        self.total_projects = 0
+
+    def __enter__(self) -> "HPCServer":
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(
+            target=_serve, args=(sender, 0, self._kwargs), daemon=True
+        )
+        self._process.start()
+        port, self.total_projects = receiver.recv()
+        receiver.close()
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self._process.terminate()
+        self._process.join()
+
+    def get_configuration_overrides(self) -> Dict[str, str]:
+        """Get project configuration values that point the scraper at the
+        server.
+
+        Returns:
+            Dict[str, str]: Configuration overrides
+        """
+        return {
+            "plans_url": f"{self.url}/v2/public/plan",
+            "api_pattern": f"{self.url}/v2/public/project/search?planCodes={{code}}"
+            "&excludeFields=governingEntities,targets&limit={rows}",
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--plans", type=int, default=20)
+    parser.add_argument("--max-projects", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--row-latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--year", type=int, default=2022)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    kwargs = vars(args)
+    port = kwargs.pop("port")
+    print(f"Serving HPC API stand-in on http://127.0.0.1:{port}")
+    _serve(None, port, kwargs)
+
+
+if __name__ == "__main__":
+    main()
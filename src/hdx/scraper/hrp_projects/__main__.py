@@ -7,78 +7,351 @@ script then creates in HDX.
 
 import logging
 from os.path import dirname, expanduser, join
+from typing import TYPE_CHECKING, Optional, Tuple
 
-from hdx.api.configuration import Configuration
-from hdx.api.utilities.hdx_error_handler import HDXErrorHandler
-from hdx.data.user import User
-from hdx.facades.infer_arguments import facade
-from hdx.utilities.dateparse import now_utc
-from hdx.utilities.downloader import Download
-from hdx.utilities.path import temp_dir_batch
-from hdx.utilities.retriever import Retrieve
+# hdx-python-api, hdx-python-utilities (which imports frictionless), the
+# countries table and pyarrow take a long time to load so they are imported
+# in the functions that need them. Importing this module is then quick and
+# --check-only does not load what is only needed to create datasets
+if TYPE_CHECKING:
+    from hdx.api.configuration import Configuration
+    from hdx.utilities.downloader import Download
+    from hdx.utilities.retriever import Retrieve
 
-from hdx.scraper.hrp_projects.hrp_projects import HRPProjects
+    from hdx.scraper.hrp_projects.cache import ResponseCache
+    from hdx.scraper.hrp_projects.countries import CountryMetadata
 
 logger = logging.getLogger(__name__)
 
 _USER_AGENT_LOOKUP = "hdx-scraper-hrp-projects"
 _SAVED_DATA_DIR = "saved_data"  # Keep in repo to avoid deletion in /tmp
+_STATE_DIR = "state"  # Kept apart from saved data which is deleted when saving
+_CACHE_DIR = "http_cache"
+_REPORT_PATH = "run_report.json"
+_PROFILE_PATH = "run_profile.prof"
 _UPDATED_BY_SCRIPT = "HDX Scraper: HRP Projects"
 
 
 def main(
     save: bool = True,
     use_saved: bool = False,
+    full_refresh: bool = False,
+    profile: bool = False,
+    dry_run: bool = False,
+    check_only: bool = False,
 ) -> None:
     """Generate datasets and create them in HDX
 
     Args:
         save (bool): Save downloaded data. Defaults to True.
         use_saved (bool): Use saved data. Defaults to False.
+        full_refresh (bool): Ignore state from last run. Defaults to False.
+        profile (bool): Profile the run with cProfile. Defaults to False.
+        dry_run (bool): Generate datasets without creating them in HDX or saving state. Defaults to False.
+        check_only (bool): Only check HRP and GHO countries. Defaults to False.
 
     Returns:
         None
     """
+    if check_only:
+        check(save, use_saved)
+        return
+    if not profile:
+        run(save, use_saved, full_refresh, dry_run)
+        return
+    import cProfile
+    import io
+    import pstats
+
+    # cProfile only sees the main thread so the time spent by worker threads
+    # is in the run report
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(run, save, use_saved, full_refresh, dry_run)
+    finally:
+        profiler.dump_stats(_PROFILE_PATH)
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(20)
+        logger.info(f"Profile saved to {_PROFILE_PATH}\n{output.getvalue()}")
+
+
+def get_retriever(
+    configuration: "Configuration",
+    downloader: "Download",
+    temp_dir: str,
+    save: bool,
+    use_saved: bool,
+) -> Tuple["Retrieve", Optional["ResponseCache"]]:
+    """Get retriever, caching responses between runs if configured
+
+    Args:
+        configuration (Configuration): Project configuration
+        downloader (Download): Download object
+        temp_dir (str): Temporary folder
+        save (bool): Save downloaded data
+        use_saved (bool): Use saved data
+
+    Returns:
+        Tuple[Retrieve, Optional[ResponseCache]]: Retriever and cache if enabled
+    """
+    from hdx.utilities.retriever import Retrieve
+
+    from hdx.scraper.hrp_projects.cache import CachingRetrieve, ResponseCache
+
+    cache_configuration = configuration.get("http_cache", {})
+    if not cache_configuration.get("enabled"):
+        retriever = Retrieve(
+            downloader=downloader,
+            fallback_dir=temp_dir,
+            saved_dir=_SAVED_DATA_DIR,
+            temp_dir=temp_dir,
+            save=save,
+            use_saved=use_saved,
+        )
+        return retriever, None
+    cache = ResponseCache(
+        _CACHE_DIR,
+        ttl=cache_configuration.get("ttl", 3600),
+        max_size=cache_configuration.get("max_size_mb", 500) * 1000000,
+    )
+    retriever = CachingRetrieve(
+        cache,
+        downloader=downloader,
+        fallback_dir=temp_dir,
+        saved_dir=_SAVED_DATA_DIR,
+        temp_dir=temp_dir,
+        save=save,
+        use_saved=use_saved,
+    )
+    return retriever, cache
+
+
+def get_country_metadata(
+    configuration: "Configuration", full_refresh: bool
+) -> "CountryMetadata":
+    """Get country metadata index kept between runs
+
+    Args:
+        configuration (Configuration): Project configuration
+        full_refresh (bool): Rebuild index
+
+    Returns:
+        CountryMetadata: Country metadata
+    """
+    from hdx.scraper.hrp_projects.countries import CountryMetadata
+
+    return CountryMetadata.get(
+        join(_STATE_DIR, "countries.json"),
+        max_age=configuration.get("country_metadata_max_age_hours", 24) * 3600,
+        rebuild=full_refresh,
+    )
+
+
+def check(save: bool, use_saved: bool) -> None:
+    """Download and filter the list of plans and check the HRP and GHO
+    countries against the countries table without downloading projects or
+    accessing HDX
+
+    Args:
+        save (bool): Save downloaded data
+        use_saved (bool): Use saved data
+
+    Returns:
+        None
+    """
+    from hdx.api.configuration import Configuration
+    from hdx.api.utilities.hdx_error_handler import HDXErrorHandler
+    from hdx.utilities.dateparse import now_utc
+    from hdx.utilities.downloader import Download
+    from hdx.utilities.path import temp_dir_batch
+
+    from hdx.scraper.hrp_projects.hrp_projects import HRPProjects
+    from hdx.scraper.hrp_projects.resilience import RetryPolicy
+
     configuration = Configuration.read()
-    User.check_current_user_write_access("ocha-hpc-tools")
     with HDXErrorHandler(should_exit_on_error=True) as error_handler:
         with temp_dir_batch(folder=_USER_AGENT_LOOKUP) as info:
             temp_dir = info["folder"]
-            with Download() as downloader:
-                retriever = Retrieve(
-                    downloader=downloader,
-                    fallback_dir=temp_dir,
-                    saved_dir=_SAVED_DATA_DIR,
-                    temp_dir=temp_dir,
-                    save=save,
-                    use_saved=use_saved,
-                )
-                hrp_projects = HRPProjects(
-                    configuration, retriever, error_handler, temp_dir
+            # requests are retried by the retry policy of HRPProjects
+            with Download(**RetryPolicy.session_kwargs) as downloader:
+                retriever, cache = get_retriever(
+                    configuration, downloader, temp_dir, save, use_saved
                 )
-                now = now_utc()
-                countryiso3s = hrp_projects.get_data(
-                    current_year=now.year, cutoff_year=now.year - 5
+                try:
+                    hrp_projects = HRPProjects(
+                        configuration,
+                        retriever,
+                        error_handler,
+                        temp_dir,
+                        # the index is rebuilt so that the flags are checked
+                        # against the current countries table
+                        country_metadata=get_country_metadata(configuration, True),
+                    )
+                    now = now_utc()
+                    plans = hrp_projects.check_plans(
+                        current_year=now.year, cutoff_year=now.year - 5
+                    )
+                    edits = hrp_projects.check_hrp_gho(current_year=now.year)
+                    logger.info(
+                        f"Checked {len(plans)} plans, "
+                        f"{'HRP or GHO countries changed' if edits else 'no changes'}"
+                    )
+                finally:
+                    if cache:
+                        cache.save()
+
+
+def run(save: bool, use_saved: bool, full_refresh: bool, dry_run: bool = False) -> None:
+    """Generate datasets and create them in HDX, saving a report of the time
+    taken by each stage of the run. In a dry run, datasets are generated but
+    not created in HDX and the state of the run is not saved.
+
+    Args:
+        save (bool): Save downloaded data
+        use_saved (bool): Use saved data
+        full_refresh (bool): Ignore state from last run
+        dry_run (bool): Do not create datasets in HDX. Defaults to False.
+
+    Returns:
+        None
+    """
+    from hdx.api.configuration import Configuration
+    from hdx.api.utilities.hdx_error_handler import HDXErrorHandler
+    from hdx.data.user import User
+    from hdx.utilities.dateparse import now_utc
+    from hdx.utilities.downloader import Download
+    from hdx.utilities.path import temp_dir_batch
+
+    from hdx.scraper.hrp_projects.hrp_projects import HRPProjects
+    from hdx.scraper.hrp_projects.instrumentation import RunReport
+    from hdx.scraper.hrp_projects.pipeline import Pipeline, Stage
+    from hdx.scraper.hrp_projects.publish import Publisher, get_hdx_create
+    from hdx.scraper.hrp_projects.resilience import RetryPolicy
+    from hdx.scraper.hrp_projects.state import PlanState
+
+    configuration = Configuration.read()
+    if not dry_run:
+        User.check_current_user_write_access("ocha-hpc-tools")
+    with HDXErrorHandler(should_exit_on_error=True) as error_handler:
+        with temp_dir_batch(folder=_USER_AGENT_LOOKUP) as info:
+            temp_dir = info["folder"]
+            # requests are retried by the retry policy of HRPProjects
+            with Download(**RetryPolicy.session_kwargs) as downloader:
+                retriever, cache = get_retriever(
+                    configuration, downloader, temp_dir, save, use_saved
                 )
-                hrp_projects.check_hrp_gho(current_year=now.year)
-                for countryiso3 in countryiso3s:
-                    dataset = hrp_projects.generate_dataset(countryiso3)
-                    if not dataset:
-                        continue
-                    dataset.update_from_yaml(
-                        path=join(
-                            dirname(__file__), "config", "hdx_dataset_static.yaml"
+                report = RunReport()
+                # responses downloaded and timings of a failed run are kept
+                try:
+                    state = PlanState(
+                        _STATE_DIR,
+                        full_refresh=full_refresh,
+                        checkpoint_max_age=configuration.get(
+                            "checkpoint_max_age_hours", 24
                         )
+                        * 3600,
                     )
-                    dataset.create_in_hdx(
-                        remove_additional_resources=True,
-                        match_resource_order=False,
-                        updated_by_script=_UPDATED_BY_SCRIPT,
-                        batch=info["batch"],
+                    publisher = None
+                    if not dry_run:
+                        publisher = Publisher(
+                            join(_STATE_DIR, "published.json"),
+                            get_hdx_create(
+                                remove_additional_resources=True,
+                                match_resource_order=False,
+                                updated_by_script=_UPDATED_BY_SCRIPT,
+                                batch=info["batch"],
+                            ),
+                            full_refresh=full_refresh,
+                        )
+                    country_metadata = get_country_metadata(configuration, full_refresh)
+                    columnar_configuration = configuration.get("columnar_export", {})
+                    projects_dataset = None
+                    if columnar_configuration.get("enabled"):
+                        from hdx.scraper.hrp_projects.columnar import ProjectsDataset
+
+                        projects_dataset = ProjectsDataset(
+                            columnar_configuration.get("folder", "projects_parquet"),
+                            configuration["headers"],
+                        )
+                    hrp_projects = HRPProjects(
+                        configuration,
+                        retriever,
+                        error_handler,
+                        temp_dir,
+                        state,
+                        report,
+                        projects_dataset,
+                        country_metadata,
                     )
+                    now = now_utc()
+
+                    # every dataset is generated so that changes to its metadata
+                    # are published even if its plans are unchanged. The publisher
+                    # skips datasets whose files and metadata are unchanged
+                    def publish(countryiso3: str) -> Optional[str]:
+                        with report.time("generate_dataset", country=countryiso3):
+                            dataset = hrp_projects.generate_dataset(countryiso3)
+                        if not dataset:
+                            return None
+                        dataset.update_from_yaml(
+                            path=join(
+                                dirname(__file__), "config", "hdx_dataset_static.yaml"
+                            )
+                        )
+                        if dry_run:
+                            logger.info(f"Dry run: not creating {dataset['name']}")
+                            return countryiso3
+                        with report.time("create_in_hdx", country=countryiso3):
+                            if not publisher.publish(dataset):
+                                return None
+                        return countryiso3
+
+                    # countries are published by a bounded pool of workers as soon
+                    # as all of their plans are downloaded while other plans are
+                    # still being downloaded
+                    pipeline = Pipeline(
+                        (
+                            Stage(
+                                "publish",
+                                publish,
+                                configuration.get("max_concurrent_countries", 2),
+                            ),
+                        ),
+                        configuration.get("pipeline_queue_size", 8),
+                    )
+                    countryiso3s = hrp_projects.iter_data(
+                        current_year=now.year, cutoff_year=now.year - 5
+                    )
+                    with report.time("get_data_and_publish"):
+                        for countryiso3 in pipeline.run(countryiso3s):
+                            logger.info(f"Published {countryiso3}")
+                    hrp_projects.check_hrp_gho(current_year=now.year)
+                    # a dry run leaves the state as it was so that the next run
+                    # still updates HDX
+                    if not dry_run:
+                        hrp_projects.save_state()
+                    logger.info(
+                        f"Skipped downloading {hrp_projects.skipped_plans} plans, "
+                        f"resumed {hrp_projects.resumed_plans} plans from checkpoint, "
+                        f"{hrp_projects.unchanged_plans} plans unchanged"
+                    )
+                    logger.info(
+                        f"Shared plan CSVs between countries instead of writing "
+                        f"{hrp_projects.rows_not_written} rows and "
+                        f"{hrp_projects.bytes_not_written} bytes"
+                    )
+                    if publisher:
+                        publisher.log_statistics()
+                finally:
+                    if cache:
+                        cache.save()
+                        cache.log_statistics()
+                    report.save(_REPORT_PATH)
 
 
 if __name__ == "__main__":
+    from hdx.facades.infer_arguments import facade
+
     facade(
         main,
         user_agent_config_yaml=join(expanduser("~"), ".useragents.yaml"),
@@ -0,0 +1,202 @@
+"""On disk cache of HTTP responses"""
+
+import logging
+import threading
+import time
+from hashlib import sha256
+from os import listdir, makedirs, remove, replace
+from os.path import exists, join
+from typing import Any, Dict
+
+from hdx.utilities.downloader import Download
+from hdx.utilities.loader import load_json
+from hdx.utilities.saver import save_json
+
+from hdx.scraper.hrp_projects.decode import JSONRetrieve
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Cache of HTTP response bodies on disk keyed by url. Responses younger
+    than ttl seconds are used without making a request. Older responses are
+    revalidated with a conditional request if the server returned an ETag or
+    Last-Modified header. When the cache grows beyond max_size bytes, the
+    least recently used responses are removed. It is safe to use from
+    multiple threads, each with its own downloader.
+
+    Args:
+        folder (str): Folder in which to keep cached responses
+        ttl (float): Seconds for which a response is used without revalidation. Defaults to 3600.
+        max_size (int): Maximum total size of cached responses in bytes. Defaults to 500 MB.
+    """
+
+    def __init__(self, folder: str, ttl: float = 3600, max_size: int = 500000000):
+        self._folder = folder
+        self._index_path = join(folder, "index.json")
+        self._ttl = ttl
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        makedirs(folder, exist_ok=True)
+        self._index = {}
+        if exists(self._index_path):
+            self._index = load_json(self._index_path)
+        # drop entries whose body is missing and bodies that are not indexed
+        self._index = {
+            key: entry
+            for key, entry in self._index.items()
+            if exists(self._get_path(key))
+        }
+        for filename in listdir(folder):
+            if filename.endswith(".body") and filename[:-5] not in self._index:
+                remove(join(folder, filename))
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+
+    def _get_path(self, key: str) -> str:
+        return join(self._folder, f"{key}.body")
+
+    @staticmethod
+    def _get_key(url: str) -> str:
+        return sha256(url.encode()).hexdigest()
+
+    def _read(self, key: str) -> bytes:
+        with open(self._get_path(key), "rb") as file:
+            return file.read()
+
+    def _store(self, key: str, url: str, content: bytes, headers: Dict) -> None:
+        path = self._get_path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(content)
+        replace(temp_path, path)
+        now = time.time()
+        with self._lock:
+            self._index[key] = {
+                "url": url,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "stored": now,
+                "accessed": now,
+                "size": len(content),
+            }
+            self._evict()
+
+    def _evict(self) -> None:
+        size = sum(entry["size"] for entry in self._index.values())
+        if size <= self._max_size:
+            return
+        for key, entry in sorted(
+            self._index.items(), key=lambda item: item[1]["accessed"]
+        ):
+            if size <= self._max_size:
+                break
+            del self._index[key]
+            path = self._get_path(key)
+            if exists(path):
+                remove(path)
+            size -= entry["size"]
+
+    def download(self, downloader: Download, url: str) -> bytes:
+        """Download url using cached response if possible.
+
+        Args:
+            downloader (Download): Download object
+            url (str): Url to download
+
+        Returns:
+            bytes: Body of response
+        """
+        key = self._get_key(url)
+        now = time.time()
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None:
+                entry = dict(entry)
+                if now - entry["stored"] < self._ttl:
+                    self._index[key]["accessed"] = now
+                    self.hits += 1
+                    self.bytes_saved += entry["size"]
+                    return self._read(key)
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = downloader.setup(url, headers=headers or None)
+        if response.status_code == 304 and entry is not None:
+            with self._lock:
+                if key in self._index:
+                    self._index[key]["stored"] = now
+                    self._index[key]["accessed"] = now
+                    self.revalidations += 1
+                    self.bytes_saved += entry["size"]
+                    return self._read(key)
+            # the response was evicted by another thread while it was being
+            # revalidated so it is downloaded again
+            response = downloader.setup(url)
+        content = response.content
+        with self._lock:
+            self.misses += 1
+            self.bytes_downloaded += len(content)
+        self._store(key, url, content, response.headers)
+        return content
+
+    def save(self) -> None:
+        """Save index of cached responses.
+
+        Returns:
+            None
+        """
+        temp_path = f"{self._index_path}.tmp"
+        with self._lock:
+            save_json(self._index, temp_path)
+            replace(temp_path, self._index_path)
+
+    def log_statistics(self) -> None:
+        """Log hits, misses and bytes saved.
+
+        Returns:
+            None
+        """
+        logger.info(
+            f"HTTP cache: {self.hits} hits, {self.revalidations} revalidated, "
+            f"{self.misses} misses, {self.bytes_downloaded} bytes downloaded, "
+            f"{self.bytes_saved} bytes saved"
+        )
+
+
+class CachingRetrieve(JSONRetrieve):
+    """Retrieve that downloads JSON through a ResponseCache. Using saved data
+    and saving downloaded data work as in Retrieve. Clones share the cache.
+
+    Args:
+        cache (ResponseCache): Response cache
+        *args: Arguments to pass to Retrieve
+        **kwargs: Keyword arguments to pass to Retrieve
+    """
+
+    def __init__(self, cache: ResponseCache, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+
+    def clone(self, downloader: Download) -> "CachingRetrieve":
+        return CachingRetrieve(
+            self.cache,
+            downloader,
+            fallback_dir=self.fallback_dir,
+            saved_dir=self.saved_dir,
+            temp_dir=self.temp_dir,
+            save=self.save,
+            use_saved=self.use_saved,
+            prefix=self.prefix,
+            delete=False,
+            log_level=self.log_level,
+        )
+
+    def download_bytes(self, url: str) -> bytes:
+        return self.cache.download(self.downloader, url)
@@ -0,0 +1,233 @@
+"""Columnar export of projects to a Parquet dataset partitioned by plan"""
+
+import logging
+from os import listdir, makedirs, remove, replace
+from os.path import exists, isdir, join
+from shutil import rmtree
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from hdx.scraper.hrp_projects.transform import LIST_COLUMNS, PLAN_CODE_HEADER
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+PARQUET_FILENAME = "projects.parquet"
+
+
+def _get_funds(row: Dict) -> Optional[float]:
+    funds = row.get("currentRequestedFunds")
+    if funds is None or funds == "":
+        return None
+    return float(funds)
+
+
+def _make_getter(header: str) -> Callable[[Dict], Optional[str]]:
+    def getter(row: Dict) -> Optional[str]:
+        value = row.get(header)
+        if value is None or isinstance(value, str):
+            return value
+        return str(value)
+
+    return getter
+
+
+class ProjectsDataset:
+    """Parquet dataset of projects with one file per plan, partitioned by plan
+    year and plan code (plan_year=2022/plan_code=RSYR22/projects.parquet).
+    Columns are those of the CSVs except that the list columns (locations,
+    globalClusters, organizations and plans) are lists of strings and
+    currentRequestedFunds is a float. Requires pyarrow.
+
+    Args:
+        folder (str): Folder of dataset
+        headers (Sequence[str]): CSV headers
+    """
+
+    def __init__(self, folder: str, headers: Sequence[str]):
+        if pa is None:
+            raise ImportError(
+                "Columnar export requires pyarrow. Install it with: pip install hdx-scraper-hrp-projects[columnar]"
+            )
+        self._folder = folder
+        self.headers = tuple(headers)
+        fields = []
+        getters = []
+        for header in self.headers:
+            if header in LIST_COLUMNS:
+                fields.append(pa.field(header, pa.list_(pa.string())))
+                getters.append(LIST_COLUMNS[header])
+            elif header == "currentRequestedFunds":
+                fields.append(pa.field(header, pa.float64()))
+                getters.append(_get_funds)
+            else:
+                fields.append(pa.field(header, pa.string()))
+                getters.append(_make_getter(header))
+        self.schema = pa.schema(fields)
+        self._getters = tuple(getters)
+        makedirs(folder, exist_ok=True)
+
+    def get_plan_folder(self, plan_year: int, plan_code: str) -> str:
+        return join(self._folder, f"plan_year={plan_year}", f"plan_code={plan_code}")
+
+    def get_temp_path(self, plan_code: str) -> str:
+        return join(self._folder, f".{plan_code}.parquet.tmp")
+
+    def has_plan(self, plan_year: int, plan_code: str) -> bool:
+        """Check if the dataset has a file for a plan.
+
+        Args:
+            plan_year (int): Plan year
+            plan_code (str): Plan code
+
+        Returns:
+            bool: True if the dataset has a file for the plan
+        """
+        return exists(
+            join(self.get_plan_folder(plan_year, plan_code), PARQUET_FILENAME)
+        )
+
+    def get_columns(self, plan_code: str, rows: Iterable[Dict]) -> Dict[str, List]:
+        """Get columns of values from project records.
+
+        Args:
+            plan_code (str): Plan code
+            rows (Iterable[Dict]): Project records from HPC API
+
+        Returns:
+            Dict[str, List]: Mapping from header to column values
+        """
+        rows = list(rows)
+        columns = {}
+        for header, getter in zip(self.headers, self._getters):
+            if header == PLAN_CODE_HEADER:
+                columns[header] = [plan_code] * len(rows)
+            else:
+                columns[header] = [getter(row) for row in rows]
+        return columns
+
+    def writer(self, plan_year: int, plan_code: str) -> "PlanWriter":
+        """Get writer of the file of a plan.
+
+        Args:
+            plan_year (int): Plan year
+            plan_code (str): Plan code
+
+        Returns:
+            PlanWriter: Writer of plan file
+        """
+        return PlanWriter(self, plan_year, plan_code)
+
+    def remove_plan(self, plan_code: str) -> None:
+        """Remove the file of a plan from every year.
+
+        Args:
+            plan_code (str): Plan code
+
+        Returns:
+            None
+        """
+        for year_folder in listdir(self._folder):
+            plan_folder = join(self._folder, year_folder, f"plan_code={plan_code}")
+            if isdir(plan_folder):
+                rmtree(plan_folder)
+
+    def prune(self, plan_codes: Iterable[str]) -> None:
+        """Remove files of plans other than the given ones.
+
+        Args:
+            plan_codes (Iterable[str]): Codes of plans to keep
+
+        Returns:
+            None
+        """
+        keep = {f"plan_code={plan_code}" for plan_code in plan_codes}
+        for year_folder in listdir(self._folder):
+            year_path = join(self._folder, year_folder)
+            if not year_folder.startswith("plan_year=") or not isdir(year_path):
+                continue
+            for plan_folder in listdir(year_path):
+                if plan_folder not in keep:
+                    logger.info(f"Removing {plan_folder} from columnar export")
+                    rmtree(join(year_path, plan_folder))
+            if not listdir(year_path):
+                rmtree(year_path)
+
+
+class PlanWriter:
+    """Write the projects of a plan to the columnar dataset a page at a time,
+    buffering rows into row groups of up to row_group_size. The file is
+    written to a temporary path and moved into place on success, replacing
+    the plan's file in any year.
+
+    Args:
+        dataset (ProjectsDataset): Columnar dataset
+        plan_year (int): Plan year
+        plan_code (str): Plan code
+        row_group_size (int): Rows per row group. Defaults to 10000.
+    """
+
+    def __init__(
+        self,
+        dataset: ProjectsDataset,
+        plan_year: int,
+        plan_code: str,
+        row_group_size: int = 10000,
+    ):
+        self._dataset = dataset
+        self._plan_year = plan_year
+        self._plan_code = plan_code
+        self._row_group_size = row_group_size
+        self._folder = dataset.get_plan_folder(plan_year, plan_code)
+        self._temp_path = dataset.get_temp_path(plan_code)
+        self._writer = None
+        self._buffer = {header: [] for header in dataset.headers}
+        self._buffered = 0
+        self.rows = 0
+
+    def __enter__(self) -> "PlanWriter":
+        self._writer = pq.ParquetWriter(self._temp_path, self._dataset.schema)
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        if exc_type is None:
+            self._flush()
+        self._writer.close()
+        if exc_type is not None:
+            remove(self._temp_path)
+            return
+        self._dataset.remove_plan(self._plan_code)
+        makedirs(self._folder, exist_ok=True)
+        replace(self._temp_path, join(self._folder, PARQUET_FILENAME))
+
+    def _flush(self) -> None:
+        if self._buffered == 0:
+            return
+        table = pa.table(self._buffer, schema=self._dataset.schema)
+        self._writer.write_table(table)
+        for column in self._buffer.values():
+            column.clear()
+        self._buffered = 0
+
+    def write_rows(self, rows: Iterable[Dict]) -> None:
+        """Write project records.
+
+        Args:
+            rows (Iterable[Dict]): Project records from HPC API
+
+        Returns:
+            None
+        """
+        columns = self._dataset.get_columns(self._plan_code, rows)
+        count = len(next(iter(columns.values()), ()))
+        for header, column in columns.items():
+            self._buffer[header].extend(column)
+        self._buffered += count
+        self.rows += count
+        if self._buffered >= self._row_group_size:
+            self._flush()
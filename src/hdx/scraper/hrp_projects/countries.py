@@ -0,0 +1,131 @@
+"""Index of country metadata used when checking HRP and GHO countries and
+generating datasets"""
+
+import logging
+import time
+from os import makedirs, replace
+from os.path import dirname, exists
+from typing import Dict, Optional, Set
+
+from hdx.utilities.loader import load_json
+from hdx.utilities.saver import save_json
+
+logger = logging.getLogger(__name__)
+
+_FLAG_HEADERS = {"HRP": "Has HRP", "GHO": "In GHO"}
+
+
+class CountryMetadata:
+    """Country names and HRP and GHO flags from the countries table of
+    hdx-python-country indexed by ISO3. The table is scanned once to build
+    the index rather than for every lookup, and the index can be saved and
+    loaded so that later runs do not need to build it again.
+
+    Args:
+        names (Dict[str, str]): Mapping from ISO3 to country name
+        flagged (Dict[str, Set[str]]): Mapping from HRP or GHO to ISO3s flagged in table
+        created (Optional[float]): Time index was built. Defaults to None (now).
+    """
+
+    def __init__(
+        self,
+        names: Dict[str, str],
+        flagged: Dict[str, Set[str]],
+        created: Optional[float] = None,
+    ):
+        self.names = names
+        self.flagged = flagged
+        self.created = created if created is not None else time.time()
+
+    @classmethod
+    def from_country(cls) -> "CountryMetadata":
+        """Build index from the countries table of hdx-python-country.
+
+        Returns:
+            CountryMetadata: Country metadata
+        """
+        # the countries table is only loaded and parsed when building the index
+        from hdx.location.country import Country
+
+        countries = Country.countriesdata()["countries"]
+        names = {}
+        flagged = {data_type: set() for data_type in _FLAG_HEADERS}
+        for iso3, country in countries.items():
+            name = Country.get_country_name_from_iso3(iso3)
+            if name:
+                names[iso3] = name
+            for data_type, header in _FLAG_HEADERS.items():
+                if country.get(header) == "Y":
+                    flagged[data_type].add(iso3)
+        return cls(names, flagged)
+
+    @classmethod
+    def load(cls, path: str, max_age: float = 86400) -> Optional["CountryMetadata"]:
+        """Load index saved by an earlier run if it is younger than max_age.
+
+        Args:
+            path (str): Path of JSON file of index
+            max_age (float): Maximum age of index in seconds. Defaults to 86400.
+
+        Returns:
+            Optional[CountryMetadata]: Country metadata or None
+        """
+        if not exists(path):
+            return None
+        data = load_json(path)
+        if time.time() - data["created"] >= max_age:
+            return None
+        flagged = {
+            data_type: set(iso3s) for data_type, iso3s in data["flagged"].items()
+        }
+        return cls(data["names"], flagged, data["created"])
+
+    @classmethod
+    def get(
+        cls, path: str, max_age: float = 86400, rebuild: bool = False
+    ) -> "CountryMetadata":
+        """Load index saved by an earlier run or build and save it if it is
+        missing or too old.
+
+        Args:
+            path (str): Path of JSON file of index
+            max_age (float): Maximum age of index in seconds. Defaults to 86400.
+            rebuild (bool): Build index even if it can be loaded. Defaults to False.
+
+        Returns:
+            CountryMetadata: Country metadata
+        """
+        country_metadata = None
+        if not rebuild:
+            country_metadata = cls.load(path, max_age)
+        if country_metadata is None:
+            logger.info("Building country metadata index")
+            country_metadata = cls.from_country()
+            country_metadata.save(path)
+        return country_metadata
+
+    def save(self, path: str) -> None:
+        """Save index.
+
+        Args:
+            path (str): Path of JSON file of index
+
+        Returns:
+            None
+        """
+        folder = dirname(path)
+        if folder:
+            makedirs(folder, exist_ok=True)
+        data = {
+            "created": self.created,
+            "names": self.names,
+            "flagged": {
+                data_type: sorted(iso3s) for data_type, iso3s in self.flagged.items()
+            },
+        }
+        temp_path = f"{path}.tmp"
+        save_json(data, temp_path)
+        replace(temp_path, path)
+
+    def get_name(self, countryiso3: str) -> Optional[str]:
+        return self.names.get(countryiso3)
@@ -0,0 +1,126 @@
+"""Fast decoding of JSON from the HPC API"""
+
+import json
+import logging
+from typing import Any, Optional
+
+from hdx.utilities.base_downloader import DownloadError
+from hdx.utilities.downloader import Download
+from hdx.utilities.retriever import Retrieve
+from hdx.utilities.saver import save_json
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:
+    orjson = None
+    loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+
+class JSONRetrieve(Retrieve):
+    """Retrieve that decodes JSON from the raw bytes of the response or saved
+    file using orjson if it is installed, which is considerably faster than
+    the json module used by Retrieve and allocates less while decoding.
+    Saving and using saved data work as in Retrieve. The number of bytes
+    decoded is kept in bytes_read.
+    """
+
+    bytes_read = 0
+
+    @classmethod
+    def from_retriever(cls, retriever: Retrieve, downloader: Download) -> Retrieve:
+        """Create JSONRetrieve with the settings of a given retriever but using
+        the given downloader. Returns a clone if the retriever is already a
+        JSONRetrieve.
+
+        Args:
+            retriever (Retrieve): Retriever whose settings to use
+            downloader (Download): Downloader to use
+
+        Returns:
+            Retrieve: JSONRetrieve object
+        """
+        if isinstance(retriever, JSONRetrieve):
+            return retriever.clone(downloader)
+        return cls(
+            downloader,
+            fallback_dir=retriever.fallback_dir,
+            saved_dir=retriever.saved_dir,
+            temp_dir=retriever.temp_dir,
+            save=retriever.save,
+            use_saved=retriever.use_saved,
+            prefix=retriever.prefix,
+            delete=False,
+            log_level=retriever.log_level,
+        )
+
+    def clone(self, downloader: Download) -> "JSONRetrieve":
+        return self.__class__(
+            downloader,
+            fallback_dir=self.fallback_dir,
+            saved_dir=self.saved_dir,
+            temp_dir=self.temp_dir,
+            save=self.save,
+            use_saved=self.use_saved,
+            prefix=self.prefix,
+            delete=False,
+            log_level=self.log_level,
+        )
+
+    def download_bytes(self, url: str) -> bytes:
+        """Download raw bytes from url.
+
+        Args:
+            url (str): Url to download
+
+        Returns:
+            bytes: Body of response
+        """
+        return self.downloader.setup(url).content
+
+    def download_json(
+        self,
+        url: str,
+        filename: Optional[str] = None,
+        logstr: Optional[str] = None,
+        fallback: bool = False,
+        log_level: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Any:
+        if kwargs:
+            return super().download_json(
+                url, filename, logstr, fallback, log_level, **kwargs
+            )
+        if log_level is None:
+            log_level = self.log_level
+        saved_filename, _ = self.get_filename(url, filename, ("json",))
+        if not logstr:
+            logstr = saved_filename
+        saved_path = self.saved_dir / saved_filename
+        if self.use_saved:
+            logger.log(log_level, f"Using saved {logstr} in {saved_path}")
+            with open(saved_path, "rb") as file:
+                content = file.read()
+            self.bytes_read += len(content)
+            return loads(content)
+        try:
+            logger.log(
+                log_level, f"Downloading {logstr} from {self.get_url_logstr(url)}"
+            )
+            content = self.download_bytes(str(url))
+            self.bytes_read += len(content)
+            rjson = loads(content)
+            del content
+        except DownloadError:
+            if not fallback:
+                raise
+            return super().download_json(
+                url, filename, logstr, fallback, log_level, **kwargs
+            )
+        if self.save:
+            logger.log(log_level, f"Saving {logstr} in {saved_path}")
+            save_json(rjson, saved_path)
+        return rjson
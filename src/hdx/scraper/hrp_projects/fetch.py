@@ -0,0 +1,187 @@
+"""Concurrent fetching of paginated HPC API results"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, Dict, Iterator, Optional
+
+from hdx.utilities.downloader import Download
+from hdx.utilities.retriever import Retrieve
+
+from hdx.scraper.hrp_projects.decode import JSONRetrieve
+from hdx.scraper.hrp_projects.instrumentation import RunReport
+from hdx.scraper.hrp_projects.planner import PageSizer
+from hdx.scraper.hrp_projects.resilience import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class PageFetcher:
+    """Fetch HPC API urls with a bounded number of requests in flight. All
+    requests go through one pool of worker threads so the bound holds across
+    plans that are downloaded at the same time. Download objects hold the
+    state of the current response so each worker thread gets its own clone of
+    the retriever, which keeps the save and use_saved behaviour of Retrieve.
+
+    Args:
+        retriever (Retrieve): Retrieve object
+        max_in_flight (int): Maximum number of concurrent requests. Defaults to 4.
+        fast_json (bool): Decode JSON with JSONRetrieve. Defaults to False.
+        report (Optional[RunReport]): Report in which to record page timings. Defaults to None.
+        page_sizer (Optional[PageSizer]): Page sizer to update from project search pages. Defaults to None.
+        retry_policy (Optional[RetryPolicy]): Retry policy for requests. Defaults to None (no retries).
+    """
+
+    def __init__(
+        self,
+        retriever: Retrieve,
+        max_in_flight: int = 4,
+        fast_json: bool = False,
+        report: Optional[RunReport] = None,
+        page_sizer: Optional[PageSizer] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        self._retriever = retriever
+        self._report = report
+        self._page_sizer = page_sizer
+        self._retry_policy = retry_policy
+        self._max_in_flight = max(1, max_in_flight)
+        self._fast_json = fast_json
+        self._local = threading.local()
+        self._downloaders = []
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self) -> "PageFetcher":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.close()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_in_flight, thread_name_prefix="fetch"
+                )
+            return self._executor
+
+    def _get_retriever(self) -> Retrieve:
+        retriever = getattr(self._local, "retriever", None)
+        if retriever is None:
+            if self._retry_policy is None:
+                downloader = Download()
+            else:
+                downloader = Download(**RetryPolicy.session_kwargs)
+            with self._lock:
+                self._downloaders.append(downloader)
+            if self._fast_json:
+                retriever = JSONRetrieve.from_retriever(self._retriever, downloader)
+            else:
+                retriever = self._retriever.clone(downloader)
+            self._local.retriever = retriever
+        return retriever
+
+    def _download_json(
+        self, url: str, plan_code: Optional[str] = None, batch: Optional[str] = None
+    ) -> Dict:
+        retriever = self._get_retriever()
+        download_json = retriever.download_json
+        if self._retry_policy is not None:
+            download_json = partial(self._retry_policy.call, download_json)
+        if self._report is None and self._page_sizer is None:
+            return download_json(url)
+        # bytes are only known when decoding with JSONRetrieve
+        bytes_read = getattr(retriever, "bytes_read", None)
+        start = time.perf_counter()
+        rjson = download_json(url)
+        seconds = time.perf_counter() - start
+        size = None
+        if bytes_read is not None:
+            size = retriever.bytes_read - bytes_read
+        if self._report is not None:
+            self._report.record("page", seconds, plan=plan_code, batch=batch)
+            if size is not None:
+                self._report.add("bytes", size, plan=plan_code, batch=batch)
+        if self._page_sizer is not None:
+            self._page_sizer.observe(len(rjson["data"]["results"]), seconds, size)
+        return rjson
+
+    def close(self) -> None:
+        """Shut down the worker threads and close their downloaders.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown()
+        with self._lock:
+            for downloader in self._downloaders:
+                downloader.close()
+            self._downloaders = []
+        self._local = threading.local()
+
+    def download_json(
+        self, url: str, plan_code: Optional[str] = None, batch: Optional[str] = None
+    ) -> Dict:
+        """Download JSON from a url using one of the worker threads.
+
+        Args:
+            url (str): Url to download
+            plan_code (Optional[str]): Plan code for report. Defaults to None.
+            batch (Optional[str]): Batch of plans for report. Defaults to None.
+
+        Returns:
+            Dict: JSON from url
+        """
+        future = self._get_executor().submit(self._download_json, url, plan_code, batch)
+        return future.result()
+
+    def iter_pages(
+        self,
+        url: str,
+        pages: int,
+        first_page: int = 2,
+        plan_code: Optional[str] = None,
+        batch: Optional[str] = None,
+    ) -> Iterator[Dict]:
+        """Iterate over pages first_page to pages (inclusive) of a paginated
+        url. At most max_in_flight pages are downloaded ahead of the page
+        being consumed so memory use is bounded by the page size.
+
+        Args:
+            url (str): Url of the first page
+            pages (int): Total number of pages
+            first_page (int): First page to fetch. Defaults to 2.
+            plan_code (Optional[str]): Plan code for report. Defaults to None.
+            batch (Optional[str]): Batch of plans for report. Defaults to None.
+
+        Returns:
+            Iterator[Dict]: JSON of each page in page order
+        """
+        urls = iter(f"{url}&page={i}" for i in range(first_page, pages + 1))
+        executor = self._get_executor()
+        window = deque()
+        for page_url in islice(urls, self._max_in_flight):
+            window.append(
+                executor.submit(self._download_json, page_url, plan_code, batch)
+            )
+        try:
+            while window:
+                page = window.popleft().result()
+                page_url = next(urls, None)
+                if page_url is not None:
+                    window.append(
+                        executor.submit(self._download_json, page_url, plan_code, batch)
+                    )
+                yield page
+        finally:
+            for future in window:
+                future.cancel()
@@ -1,167 +1,602 @@
 #!/usr/bin/python
 """hrp projects scraper"""
 
+import json
 import logging
-from typing import List, Optional
+import threading
+from collections import deque
+from concurrent.futures import Future
+from contextlib import ExitStack
+from hashlib import sha256
+from os import link, remove
+from os.path import exists, getsize, join
+from shutil import copyfile
+from typing import (
+    TYPE_CHECKING,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
-from hdx.api.configuration import Configuration
-from hdx.api.utilities.hdx_error_handler import HDXErrorHandler
-from hdx.data.dataset import Dataset
-from hdx.location.country import Country
 from hdx.utilities.dateparse import parse_date
-from hdx.utilities.dictandlist import dict_of_lists_add, dict_of_sets_add
 from hdx.utilities.retriever import Retrieve
 
+from hdx.scraper.hrp_projects.countries import CountryMetadata
+from hdx.scraper.hrp_projects.fetch import PageFetcher
+from hdx.scraper.hrp_projects.instrumentation import RunReport
+from hdx.scraper.hrp_projects.model import CountryIndex, Plan
+from hdx.scraper.hrp_projects.pipeline import Pipeline, Stage
+from hdx.scraper.hrp_projects.planner import PageSizer, batch_plans, split_projects
+from hdx.scraper.hrp_projects.render import CSVRenderer
+from hdx.scraper.hrp_projects.resilience import RetryPolicy
+from hdx.scraper.hrp_projects.spool import CSVSpool
+from hdx.scraper.hrp_projects.state import PlanState
+
+# the hdx-python-api data classes and pyarrow take a long time to import so
+# they are only imported when needed
+if TYPE_CHECKING:
+    from hdx.api.configuration import Configuration
+    from hdx.api.utilities.hdx_error_handler import HDXErrorHandler
+    from hdx.data.dataset import Dataset
+
+    from hdx.scraper.hrp_projects.columnar import PlanWriter, ProjectsDataset
+
 logger = logging.getLogger(__name__)
 
 
 class HRPProjects:
     def __init__(
         self,
-        configuration: Configuration,
+        configuration: "Configuration",
         retriever: Retrieve,
-        error_handler: HDXErrorHandler,
+        error_handler: "HDXErrorHandler",
         temp_dir: str,
+        state: Optional[PlanState] = None,
+        report: Optional[RunReport] = None,
+        projects_dataset: Optional["ProjectsDataset"] = None,
+        country_metadata: Optional[CountryMetadata] = None,
     ):
         self._configuration = configuration
         self._retriever = retriever
         self._error_handler = error_handler
         self._temp_dir = temp_dir
-        self.plans_data_json = {}
-        self.plans_data_csv = {}
-        self.dates = {}
-        self.hrp_countries = []
-        self.gho_countries = []
+        self._page_fetcher = None
+        self._page_sizer = None
+        self._retry_policy = RetryPolicy.from_configuration(configuration.get("fetch"))
+        self._renderer = None
+        self._lock = threading.Lock()
+        self._pending_plans = {}
+        self._state = state
+        self._current_year = None
+        self.report = report if report is not None else RunReport()
+        self._projects_dataset = projects_dataset
+        # runs pass in the index kept between runs. Otherwise it is built
+        # here, before any download threads are started
+        if country_metadata is None:
+            country_metadata = CountryMetadata.from_country()
+        self.country_metadata = country_metadata
+        self.skipped_plans = 0
+        self.resumed_plans = 0
+        self.unchanged_plans = 0
+        self.rows_not_written = 0
+        self.bytes_not_written = 0
+        self.countries: Dict[str, CountryIndex] = {}
+        self.hrp_countries: Set[str] = set()
+        self.gho_countries: Set[str] = set()
 
     def get_data(self, current_year: int, cutoff_year: int) -> List[str]:
-        plans_data = self._retriever.download_json(self._configuration["plans_url"])
-        for plan in plans_data["data"]:
-            plan_code = plan["planVersion"]["code"]
-
-            # skip if there's no country ISO3
-            iso3s = []
-            for location in plan["locations"]:
-                if location.get("adminLevel") == 0:
-                    iso3 = location.get("iso3")
-                    if iso3:
-                        iso3s.append(iso3)
-            if len(iso3s) == 0:
-                logger.info(f"Skipping {plan_code} (no country code)")
-                continue
+        with self.report.time("get_data"):
+            for _ in self.iter_data(current_year, cutoff_year):
+                pass
+        return sorted(self.countries)
 
-            # skip if it's from before the cutoff year
-            plan_year = 0
-            for year in plan["years"]:
-                if "year" in year and int(year["year"]) >= plan_year:
-                    plan_year = int(year["year"])
-            if plan_year < cutoff_year:
-                logger.info(f"Skipping {plan_code} (before {cutoff_year})")
-                continue
+    def iter_data(self, current_year: int, cutoff_year: int) -> Iterator[str]:
+        """Filter plans and download their projects in batches in a pipeline,
+        yielding each country ISO3 once all of the plans for that country have
+        been added. Plans are added in the order returned by the API so the
+        data is the same as when downloading one plan at a time.
 
-            # update HRP and GHO lists
-            if plan_year == current_year:
-                if (
-                    plan["planVersion"]["subtitle"].lower()
-                    in self._configuration["hrp_subtitles"]
-                ):
-                    for iso3 in iso3s:
-                        self.hrp_countries.append(iso3)
-                if plan["planVersion"]["isPartOfGHO"]:
-                    for iso3 in iso3s:
-                        self.gho_countries.append(iso3)
-
-            # skip if it doesn't have any projects
-            project_url = self._configuration["api_pattern"].format(
-                code=plan_code, rows=500
+        Args:
+            current_year (int): Current year
+            cutoff_year (int): Plans from before this year are skipped
+
+        Returns:
+            Iterator[str]: Country ISO3s with data
+        """
+        # filtering is quick so all plans are filtered before downloading to
+        # allow consecutive plans to be batched
+        plans = self.get_plans(current_year, cutoff_year)
+        yielded = set()
+        plan_codes = []
+        search_configuration = self._configuration.get("project_search", {})
+        batches = batch_plans(
+            plans,
+            search_configuration.get("batch_max_plans", 1),
+            search_configuration.get("batch_max_rows", 100),
+            self._get_previous_rows,
+        )
+        # saved data is looked up by url so the page size must not change
+        replaying = getattr(self._retriever, "save", False) or getattr(
+            self._retriever, "use_saved", False
+        )
+        self._page_sizer = PageSizer(
+            initial=search_configuration.get("page_size", 500),
+            minimum=search_configuration.get("min_page_size", 100),
+            maximum=search_configuration.get("max_page_size", 1000),
+            target_seconds=search_configuration.get("target_page_seconds", 2),
+            target_bytes=search_configuration.get("target_page_mb", 10) * 1000000,
+            adaptive=search_configuration.get("adaptive_page_size", False)
+            and not replaying,
+        )
+        pipeline = Pipeline(
+            (
+                Stage(
+                    "download",
+                    self._download_batch,
+                    self._configuration.get("max_concurrent_plans", 2),
+                ),
+            ),
+            self._configuration.get("pipeline_queue_size", 8),
+        )
+        with (
+            PageFetcher(
+                self._retriever,
+                self._configuration.get("max_concurrent_pages", 4),
+                self._configuration.get("fast_json", True),
+                self.report,
+                self._page_sizer,
+                self._retry_policy,
+            ) as self._page_fetcher,
+            CSVRenderer(
+                self._configuration["headers"],
+                self._configuration.get("render_processes", 0),
+            ) as self._renderer,
+        ):
+            for batch in pipeline.run(batches):
+                for plan in batch:
+                    self._add_plan(plan)
+                    if plan.has_projects:
+                        plan_codes.append(plan.code)
+                for countryiso3 in self._get_ready_countries():
+                    if countryiso3 not in yielded:
+                        yielded.add(countryiso3)
+                        yield countryiso3
+        if self._retry_policy.retried:
+            logger.info(f"Retried {self._retry_policy.retried} requests")
+        if self._projects_dataset is not None:
+            self._projects_dataset.prune(plan_codes)
+        for countryiso3 in sorted(self.countries):
+            if countryiso3 not in yielded:
+                yield countryiso3
+
+    def get_plans(self, current_year: int, cutoff_year: int) -> List[Plan]:
+        """Download the list of plans and filter them.
+
+        Args:
+            current_year (int): Current year
+            cutoff_year (int): Plans from before this year are skipped
+
+        Returns:
+            List[Plan]: Plans that passed filtering
+        """
+        self._current_year = current_year
+        with self.report.time("plans"):
+            plans_data = self._retry_policy.call(
+                self._retriever.download_json, self._configuration["plans_url"]
             )
-            project_data_json = self._retriever.download_json(project_url)
-            if len(project_data_json["data"]["results"]) == 0:
-                logger.info(f"Skipping {plan_code} (no projects)")
+        plans = plans_data["data"]
+        self._pending_plans = {}
+        return [
+            plan
+            for plan in (
+                self._filter_plan(plan, current_year, cutoff_year) for plan in plans
+            )
+            if plan is not None
+        ]
+
+    def check_plans(self, current_year: int, cutoff_year: int) -> List[Plan]:
+        """Download the list of plans and filter them, updating the HRP and
+        GHO countries without downloading any projects. This is enough for
+        check_hrp_gho.
+
+        Args:
+            current_year (int): Current year
+            cutoff_year (int): Plans from before this year are skipped
+
+        Returns:
+            List[Plan]: Plans that passed filtering
+        """
+        plans = self.get_plans(current_year, cutoff_year)
+        for plan in plans:
+            self._add_flags(plan)
+        return plans
+
+    def _filter_plan(
+        self, plan: Dict, current_year: int, cutoff_year: int
+    ) -> Optional[Plan]:
+        plan_code = plan["planVersion"]["code"]
+
+        # skip if there's no country ISO3
+        iso3s = []
+        for location in plan["locations"]:
+            if location.get("adminLevel") == 0:
+                iso3 = location.get("iso3")
+                if iso3:
+                    iso3s.append(iso3)
+        if len(iso3s) == 0:
+            logger.info(f"Skipping {plan_code} (no country code)")
+            return None
+
+        # skip if it's from before the cutoff year
+        plan_year = 0
+        for year in plan["years"]:
+            if "year" in year and int(year["year"]) >= plan_year:
+                plan_year = int(year["year"])
+        if plan_year < cutoff_year:
+            logger.info(f"Skipping {plan_code} (before {cutoff_year})")
+            return None
+
+        # flag for HRP and GHO lists
+        is_hrp = False
+        is_gho = False
+        if plan_year == current_year:
+            if (
+                plan["planVersion"]["subtitle"].lower()
+                in self._configuration["hrp_subtitles"]
+            ):
+                is_hrp = True
+            if plan["planVersion"]["isPartOfGHO"]:
+                is_gho = True
+
+        for iso3 in iso3s:
+            self._pending_plans[iso3] = self._pending_plans.get(iso3, 0) + 1
+        plan_version = plan["planVersion"]
+        return Plan(
+            code=plan_code,
+            name=plan_version.get("name"),
+            start=plan_version.get("startDate"),
+            end=plan_version.get("endDate"),
+            start_date=parse_date(plan_version.get("startDate")),
+            end_date=parse_date(plan_version.get("endDate")),
+            url=self._configuration["api_pattern"].format(code=plan_code, rows=100000),
+            iso3s=tuple(iso3s),
+            year=plan_year,
+            is_hrp=is_hrp,
+            is_gho=is_gho,
+            fingerprint=self._get_plan_fingerprint(plan),
+        )
+
+    def _get_plan_fingerprint(self, plan: Dict) -> str:
+        # the headers are included as they determine the content of the CSV
+        fingerprint = [
+            plan.get("id"),
+            plan.get("updatedAt"),
+            plan["planVersion"].get("id"),
+            plan["planVersion"].get("updatedAt"),
+            self._configuration["headers"],
+        ]
+        return sha256(json.dumps(fingerprint).encode()).hexdigest()
+
+    @staticmethod
+    def _update_projects_fingerprint(fingerprint, project_data: List[Dict]) -> None:
+        for row in project_data:
+            fingerprint.update(
+                f"{row.get('id')}|{row.get('latestVersionId')}|{row.get('updatedAt')}\n".encode()
+            )
+
+    def _use_stored_plan(self, plan: Plan) -> bool:
+        # projects in plans for the current year can change without the plan
+        # changing so those are downloaded unless configured otherwise
+        if self._state is None:
+            return False
+        if plan.year >= self._current_year and self._configuration.get(
+            "always_download_current_year", True
+        ):
+            return False
+        if not self._state.is_plan_unchanged(plan.code, plan.fingerprint):
+            return False
+        return self._has_columnar_plan(plan)
+
+    def _has_columnar_plan(self, plan: Plan) -> bool:
+        # stored plans are downloaded again if they are missing from the
+        # columnar export, for example when it has just been enabled
+        if self._projects_dataset is None:
+            return True
+        return self._projects_dataset.has_plan(plan.year, plan.code)
+
+    def _get_previous_rows(self, plan_code: str) -> Optional[int]:
+        if self._state is None:
+            return None
+        stored_plan = self._state.get_plan(plan_code)
+        if stored_plan is None:
+            return None
+        return stored_plan.get("rows")
+
+    def _download_batch(self, batch: List[Plan]) -> List[Plan]:
+        plans = []
+        for plan in batch:
+            if self._use_stored_plan(plan):
+                logger.info(f"Using stored {plan.code} (unchanged)")
+                self._use_stored(
+                    plan,
+                    self._state.get_csv_path(plan.code),
+                    self._state.get_plan(plan.code),
+                )
+                with self._lock:
+                    self.skipped_plans += 1
                 continue
+            if self._state is not None:
+                checkpoint = self._state.get_checkpoint(plan.code, plan.fingerprint)
+                if checkpoint is not None and self._has_columnar_plan(plan):
+                    logger.info(f"Using checkpointed {plan.code} from failed run")
+                    self._use_stored(
+                        plan, self._state.get_checkpoint_csv_path(plan.code), checkpoint
+                    )
+                    with self._lock:
+                        self.resumed_plans += 1
+                    continue
+            plans.append(plan)
+        if plans:
+            # a batch of several plans is recorded in the report under its
+            # joined plan codes apart from the plans
+            plan_codes = ",".join(plan.code for plan in plans)
+            report_plan = plan_codes if len(plans) == 1 else None
+            report_batch = None if report_plan else plan_codes
+            with self.report.time(
+                "download_plan", plan=report_plan, batch=report_batch
+            ):
+                self._get_projects(plans, plan_codes, report_plan, report_batch)
+            if self._state is not None:
+                for plan in plans:
+                    if plan.has_projects:
+                        self._state.checkpoint_plan(
+                            plan.code,
+                            plan.fingerprint,
+                            plan.projects_fingerprint,
+                            plan.csv_path,
+                            plan.rows,
+                        )
+        for plan in batch:
+            self.report.add("rows", plan.rows, plan=plan.code)
+        return batch
 
-            # add these plans and dates
-            start_date = parse_date(plan["planVersion"].get("startDate"))
-            end_date = parse_date(plan["planVersion"].get("endDate"))
-
-            plan_row = {
-                "code": plan_code,
-                "name": plan["planVersion"].get("name"),
-                "start": plan["planVersion"].get("startDate"),
-                "end": plan["planVersion"].get("endDate"),
-                "url": self._configuration["api_pattern"].format(
-                    code=plan_code, rows=100000
-                ),
+    def _use_stored(self, plan: Plan, stored_path: str, stored_plan: Dict) -> None:
+        plan_code = plan.code
+        plan_path = join(self._temp_dir, self.get_plan_csv_filename(plan_code))
+        copyfile(stored_path, plan_path)
+        plan.csv_path = plan_path
+        plan.csv_files = self._share_plan_csv(plan_code, plan.iso3s, plan_path, None)
+        plan.projects_fingerprint = stored_plan["projects"]
+        plan.rows = stored_plan.get("rows") or 0
+
+    def _get_projects(
+        self,
+        plans: List[Plan],
+        plan_codes: str,
+        report_plan: Optional[str],
+        batch: Optional[str],
+    ) -> None:
+        limit = self._page_sizer.limit
+        project_url = self._configuration["api_pattern"].format(
+            code=plan_codes, rows=limit
+        )
+        project_data_json = self._page_fetcher.download_json(
+            project_url, report_plan, batch
+        )
+        pagination = project_data_json["data"]["pagination"]
+        if pagination.get("limit", limit) < limit:
+            self._page_sizer.set_server_limit(pagination["limit"])
+
+        # skip if there aren't any projects
+        project_data = project_data_json["data"]["results"]
+        if len(project_data) == 0:
+            for plan in plans:
+                logger.info(f"Skipping {plan.code} (no projects)")
+            return
+
+        # write each page of results to disk as it arrives, split by plan
+        pages = pagination["pages"]
+        del project_data_json
+        headers = self._configuration["headers"]
+        fingerprints = {plan.code: sha256() for plan in plans}
+        with ExitStack() as stack:
+            spools = {
+                plan.code: stack.enter_context(
+                    CSVSpool(
+                        join(self._temp_dir, self.get_plan_csv_filename(plan.code)),
+                        headers,
+                    )
+                )
+                for plan in plans
             }
-            for iso3 in iso3s:
-                dict_of_sets_add(self.dates, iso3, start_date)
-                dict_of_sets_add(self.dates, iso3, end_date)
-                dict_of_lists_add(self.plans_data_json, iso3, plan_row)
-
-            # paginate through results
-            project_data = project_data_json["data"]["results"]
-            pages = project_data_json["data"]["pagination"]["pages"]
-            if pages > 1:
-                for i in range(2, pages + 1):
-                    extra_project_data = self._retriever.download_json(
-                        project_url + f"&page={i}"
+            writers = {}
+            if self._projects_dataset is not None:
+                writers = {
+                    plan.code: stack.enter_context(
+                        self._projects_dataset.writer(plan.year, plan.code)
                     )
-                    project_data.extend(extra_project_data["data"]["results"])
-            for row in project_data:
-                csv_row = {
-                    key: value
-                    for key, value in row.items()
-                    if key in self._configuration["headers"]
+                    for plan in plans
                 }
-                if row["locations"] is not None:
-                    csv_row["locations"] = ", ".join(
-                        [
-                            country["iso3"]
-                            for country in row["locations"]
-                            if country["iso3"]
-                        ]
-                    )
-                if row["globalClusters"] is not None:
-                    csv_row["globalClusters"] = ", ".join(
-                        [cluster["name"] for cluster in row["globalClusters"]]
-                    )
-                if row["organizations"] is not None:
-                    csv_row["organizations"] = ", ".join(
-                        [org["name"] for org in row["organizations"]]
-                    )
-                if row["plans"] is not None:
-                    plan_names = list(set([plan["name"] for plan in row["plans"]]))
-                    csv_row["plans"] = ", ".join(plan_names)
-                csv_row["Response plan code"] = plan_code
-                for iso3 in iso3s:
-                    if iso3 not in self.plans_data_csv:
-                        self.plans_data_csv[iso3] = {}
-                    dict_of_lists_add(self.plans_data_csv[iso3], plan_code, csv_row)
+            # pages being rendered in worker processes, oldest first
+            rendering = deque()
+            self._write_projects(spools, writers, fingerprints, rendering, project_data)
+            del project_data
+            for extra_project_data in self._page_fetcher.iter_pages(
+                project_url, pages, plan_code=report_plan, batch=batch
+            ):
+                self._write_projects(
+                    spools,
+                    writers,
+                    fingerprints,
+                    rendering,
+                    extra_project_data["data"]["results"],
+                )
+            self._write_rendered(rendering, 0)
+        for plan in plans:
+            plan_code = plan.code
+            plan_path = join(self._temp_dir, self.get_plan_csv_filename(plan_code))
+            rows = spools[plan_code].rows
+            if rows == 0:
+                logger.info(f"Skipping {plan_code} (no projects)")
+                remove(plan_path)
+                if self._projects_dataset is not None:
+                    self._projects_dataset.remove_plan(plan_code)
+                continue
+            plan.csv_path = plan_path
+            plan.rows = rows
+            plan.csv_files = self._share_plan_csv(
+                plan_code, plan.iso3s, plan_path, rows
+            )
+            plan.projects_fingerprint = fingerprints[plan_code].hexdigest()
+
+    def _write_projects(
+        self,
+        spools: Dict[str, CSVSpool],
+        writers: Dict[str, "PlanWriter"],
+        fingerprints: Dict,
+        rendering: Deque[Tuple[CSVSpool, Future[str], int]],
+        project_data: List[Dict],
+    ) -> None:
+        if len(spools) == 1:
+            split = dict.fromkeys(spools, project_data)
+        else:
+            split = split_projects(project_data, tuple(spools))
+        for plan_code, projects in split.items():
+            self._update_projects_fingerprint(fingerprints[plan_code], projects)
+            rendering.append(
+                (
+                    spools[plan_code],
+                    self._renderer.submit(plan_code, projects),
+                    len(projects),
+                )
+            )
+            if writers:
+                writers[plan_code].write_rows(projects)
+        self._write_rendered(rendering, self._renderer.processes)
+
+    @staticmethod
+    def _write_rendered(
+        rendering: Deque[Tuple[CSVSpool, Future[str], int]], max_pending: int
+    ) -> None:
+        # CSV text is written in page order. The download thread only waits
+        # for the oldest page when more than max_pending pages are being
+        # rendered so that it keeps several worker processes busy
+        while rendering and (len(rendering) > max_pending or rendering[0][1].done()):
+            spool, future, rows = rendering.popleft()
+            spool.write_text(future.result(), rows)
 
-        return sorted(list(self.plans_data_json.keys()))
+    @staticmethod
+    def get_csv_filename(plan_code: str, countryiso3: str) -> str:
+        return f"{plan_code.lower()}-{countryiso3.lower()}-projects.csv"
+
+    @staticmethod
+    def get_plan_csv_filename(plan_code: str) -> str:
+        return f"{plan_code.lower()}-projects.csv"
+
+    def _share_plan_csv(
+        self,
+        plan_code: str,
+        iso3s: Sequence[str],
+        plan_path: str,
+        rows: Optional[int],
+    ) -> Dict[str, str]:
+        # the CSV is the same for every country in a plan so it is written
+        # once and hard linked (or copied if that fails) to each country's name
+        csv_files = {}
+        for iso3 in iso3s:
+            csv_path = join(self._temp_dir, self.get_csv_filename(plan_code, iso3))
+            if exists(csv_path):
+                remove(csv_path)
+            try:
+                link(plan_path, csv_path)
+            except OSError:
+                copyfile(plan_path, csv_path)
+            csv_files[iso3] = csv_path
+        with self._lock:
+            if rows is not None:
+                self.rows_not_written += rows * (len(iso3s) - 1)
+            self.bytes_not_written += getsize(plan_path) * (len(iso3s) - 1)
+        return csv_files
+
+    def _add_flags(self, plan: Plan) -> None:
+        # update HRP and GHO lists
+        if plan.is_hrp:
+            self.hrp_countries.update(plan.iso3s)
+        if plan.is_gho:
+            self.gho_countries.update(plan.iso3s)
+
+    def _add_plan(self, plan: Plan) -> None:
+        self._add_flags(plan)
+
+        if plan.has_projects:
+            # add this plan to its countries
+            for iso3 in plan.iso3s:
+                country = self.countries.get(iso3)
+                if country is None:
+                    country = CountryIndex(iso3)
+                    self.countries[iso3] = country
+                country.add_plan(plan)
+                self.report.add("rows", plan.rows, country=iso3)
+
+            # count plans unchanged since the last run and record their state
+            if self._state is not None:
+                stored_plan = self._state.get_plan(plan.code)
+                if (
+                    stored_plan
+                    and stored_plan["fingerprint"] == plan.fingerprint
+                    and stored_plan["projects"] == plan.projects_fingerprint
+                ):
+                    self.unchanged_plans += 1
+                self._state.set_plan(
+                    plan.code,
+                    plan.fingerprint,
+                    plan.projects_fingerprint,
+                    plan.csv_path,
+                    plan.rows,
+                )
+
+        with self._lock:
+            for iso3 in plan.iso3s:
+                self._pending_plans[iso3] -= 1
+
+    def _get_ready_countries(self) -> List[str]:
+        with self._lock:
+            return sorted(
+                iso3
+                for iso3, pending in self._pending_plans.items()
+                if pending == 0 and iso3 in self.countries
+            )
+
+    def save_state(self) -> None:
+        """Save state of plans for the next run.
+
+        Returns:
+            None
+        """
+        if self._state is None:
+            return
+        self._state.save()
 
     def check_hrp_gho(self, current_year: int, flag=True) -> List:
-        country_data = Country.countriesdata()["countries"]
         edits = []
-        header_lookup = {"GHO": "In GHO", "HRP": "Has HRP"}
         for data_type in ["GHO", "HRP"]:
             exceptions = self._configuration["hrp_gho_exceptions"].get(
                 f"{data_type}_{current_year}", {}
             )
             add_countries = exceptions.get("add", [])
             remove_countries = exceptions.get("remove", [])
-            old_list = [
-                key
-                for key in country_data
-                if country_data[key][header_lookup[data_type]] == "Y"
-            ]
-            new_list = self.gho_countries if data_type == "GHO" else self.hrp_countries
-            new_list = new_list + add_countries
-            new_list = [iso for iso in new_list if iso not in remove_countries]
-            new_list = list(set(new_list))
-            if sorted(old_list) != sorted(new_list):
-                add_countries = [c for c in new_list if c not in old_list]
+            old_set = self.country_metadata.flagged[data_type]
+            new_set = self.gho_countries if data_type == "GHO" else self.hrp_countries
+            new_set = (new_set | set(add_countries)) - set(remove_countries)
+            if old_set != new_set:
+                add_countries = sorted(new_set - old_set)
                 edits.append(add_countries)
-                remove_countries = [c for c in old_list if c not in new_list]
+                remove_countries = sorted(old_set - new_set)
                 edits.append(remove_countries)
                 self._error_handler.add_message(
                     "HRP Projects",
@@ -182,8 +617,11 @@ class HRPProjects:
                     )
         return edits
 
-    def generate_dataset(self, countryiso3: str) -> Optional[Dataset]:
-        country_name = Country.get_country_name_from_iso3(countryiso3)
+    def generate_dataset(self, countryiso3: str) -> Optional["Dataset"]:
+        from hdx.data.dataset import Dataset
+        from hdx.data.resource import Resource
+
+        country_name = self.country_metadata.get_name(countryiso3)
         if not country_name:
             logger.error(f"Could not find iso {countryiso3}")
             return None
@@ -193,9 +631,8 @@ class HRPProjects:
                 "title": f"{country_name}: Response Plan projects",
             }
         )
-        start_date = min(self.dates[countryiso3])
-        end_date = max(self.dates[countryiso3])
-        dataset.set_time_period(start_date, end_date)
+        country = self.countries[countryiso3]
+        dataset.set_time_period(country.start_date, country.end_date)
         dataset.add_tags(self._configuration["tags"])
         dataset.add_country_location(countryiso3)
         dataset["caveats"] = (
@@ -205,30 +642,25 @@ class HRPProjects:
             f"Projects proposed, in progress, or completed as part of the annual {country_name} Humanitarian Response Plans (HRPs) or other Humanitarian Programme Cycle plans. The original data is available on https://hpc.tools\r\n\r\n**Important:** some projects in {country_name} might be missing, and others might not apply specifically to {country_name}. See _Caveats_ under the _Additional information_ tab."
         )
 
-        # Add two resources (csv and JSON) for each plan specified
-        headers = self._configuration["headers"]
-        plans = self.plans_data_json[countryiso3]
-        for plan in sorted(plans, key=lambda plan: plan["start"], reverse=True):
-            plan_code = plan["code"]
-            plan_name = plan["name"]
-            data_csv = self.plans_data_csv[countryiso3][plan_code]
-            resourcedata_csv = {
-                "name": f"{plan_code.lower()}-{countryiso3.lower()}-projects.csv",
-                "description": f"Projects for {plan_name}: simplified CSV data.",
-            }
-            dataset.generate_resource(
-                self._temp_dir,
-                f"{plan_code.lower()}-{countryiso3.lower()}-projects.csv",
-                data_csv,
-                resourcedata_csv,
-                headers,
-                encoding="utf-8-sig",
-            )
+        # Add two resources (csv and JSON) for each plan specified. The CSVs
+        # were already written to disk while downloading
+        for plan in sorted(country.plans, key=lambda plan: plan.start, reverse=True):
+            plan_code = plan.code
+            plan_name = plan.name
+            with self.report.time("resource", plan=plan_code, country=countryiso3):
+                resourcedata_csv = {
+                    "name": self.get_csv_filename(plan_code, countryiso3),
+                    "description": f"Projects for {plan_name}: simplified CSV data.",
+                }
+                resource = Resource(resourcedata_csv)
+                resource.set_format("csv")
+                resource.set_file_to_upload(plan.csv_files[countryiso3])
+                dataset.add_update_resource(resource)
 
             resourcedata_json = {
                 "name": f"{plan_code.lower()}-{countryiso3.lower()}-projects.json",
                 "description": f"Projects for {plan_name}: original JSON, from HPC.tools",
-                "url": plan["url"],
+                "url": plan.url,
                 "format": "json",
             }
             dataset.add_update_resource(resourcedata_json)
@@ -0,0 +1,210 @@
+"""Timing and resource instrumentation of a run"""
+
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from math import ceil
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from hdx.utilities.saver import save_json
+
+try:
+    import resource as rusage
+except ImportError:
+    rusage = None
+
+logger = logging.getLogger(__name__)
+
+
+def get_peak_rss() -> Optional[int]:
+    """Get peak resident set size of the process in bytes if available.
+
+    Returns:
+        Optional[int]: Peak RSS in bytes or None
+    """
+    if rusage is None:
+        return None
+    peak = rusage.getrusage(rusage.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS bytes
+    if sys.platform != "darwin":
+        peak *= 1024
+    return peak
+
+
+def get_percentile(values: Sequence[float], percentile: float) -> float:
+    """Get percentile of values using the nearest rank method.
+
+    Args:
+        values (Sequence[float]): Sorted values
+        percentile (float): Percentile between 0 and 100
+
+    Returns:
+        float: Percentile of values
+    """
+    index = max(0, ceil(percentile * len(values) / 100) - 1)
+    return values[index]
+
+
+class RunReport:
+    """Collect wall time of stages of a run along with bytes downloaded and
+    rows processed, aggregated overall and per plan and per country, with
+    percentiles of the time taken by each stage. Plans downloaded together in
+    one batch are aggregated per batch. It is safe to use from multiple
+    threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.stages: Dict[str, Dict] = {}
+        self.plans: Dict[str, Dict] = {}
+        self.batches: Dict[str, Dict] = {}
+        self.countries: Dict[str, Dict] = {}
+        self._durations: Dict[str, List[float]] = {}
+
+    @staticmethod
+    def _add_time(stats: Dict, stage: str, seconds: float) -> None:
+        stage_stats = stats.setdefault(stage, {"count": 0, "seconds": 0.0})
+        stage_stats["count"] += 1
+        stage_stats["seconds"] += seconds
+        stage_stats["max_seconds"] = max(stage_stats.get("max_seconds", 0), seconds)
+
+    @contextmanager
+    def time(
+        self,
+        stage: str,
+        plan: Optional[str] = None,
+        country: Optional[str] = None,
+        batch: Optional[str] = None,
+    ) -> Iterator[None]:
+        """Context manager recording the wall time of a stage.
+
+        Args:
+            stage (str): Name of stage
+            plan (Optional[str]): Plan code to attribute time to. Defaults to None.
+            country (Optional[str]): Country ISO3 to attribute time to. Defaults to None.
+            batch (Optional[str]): Batch of plans to attribute time to. Defaults to None.
+
+        Returns:
+            Iterator[None]
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, plan, country, batch)
+
+    def record(
+        self,
+        stage: str,
+        seconds: float,
+        plan: Optional[str] = None,
+        country: Optional[str] = None,
+        batch: Optional[str] = None,
+    ) -> None:
+        """Record the wall time of a stage that was timed elsewhere.
+
+        Args:
+            stage (str): Name of stage
+            seconds (float): Wall time of stage
+            plan (Optional[str]): Plan code to attribute time to. Defaults to None.
+            country (Optional[str]): Country ISO3 to attribute time to. Defaults to None.
+            batch (Optional[str]): Batch of plans to attribute time to. Defaults to None.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._add_time(self.stages, stage, seconds)
+            self._durations.setdefault(stage, []).append(seconds)
+            if plan is not None:
+                plan_stats = self.plans.setdefault(plan, {})
+                self._add_time(plan_stats.setdefault("stages", {}), stage, seconds)
+            if country is not None:
+                country_stats = self.countries.setdefault(country, {})
+                self._add_time(country_stats.setdefault("stages", {}), stage, seconds)
+            if batch is not None:
+                batch_stats = self.batches.setdefault(batch, {})
+                self._add_time(batch_stats.setdefault("stages", {}), stage, seconds)
+
+    def add(
+        self,
+        counter: str,
+        value: int,
+        plan: Optional[str] = None,
+        country: Optional[str] = None,
+        batch: Optional[str] = None,
+    ) -> None:
+        """Add to a counter such as bytes or rows.
+
+        Args:
+            counter (str): Name of counter
+            value (int): Value to add
+            plan (Optional[str]): Plan code to attribute value to. Defaults to None.
+            country (Optional[str]): Country ISO3 to attribute value to. Defaults to None.
+            batch (Optional[str]): Batch of plans to attribute value to. Defaults to None.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if plan is not None:
+                plan_stats = self.plans.setdefault(plan, {})
+                plan_stats[counter] = plan_stats.get(counter, 0) + value
+            if country is not None:
+                country_stats = self.countries.setdefault(country, {})
+                country_stats[counter] = country_stats.get(counter, 0) + value
+            if batch is not None:
+                batch_stats = self.batches.setdefault(batch, {})
+                batch_stats[counter] = batch_stats.get(counter, 0) + value
+
+    def to_dict(self) -> Dict:
+        """Get report as a dictionary.
+
+        Returns:
+            Dict: Report
+        """
+        with self._lock:
+            totals = {}
+            for stats in (*self.plans.values(), *self.batches.values()):
+                for counter, value in stats.items():
+                    if counter != "stages":
+                        totals[counter] = totals.get(counter, 0) + value
+            stages = {}
+            for stage, stats in self.stages.items():
+                durations = sorted(self._durations[stage])
+                stages[stage] = {
+                    **stats,
+                    "p50_seconds": get_percentile(durations, 50),
+                    "p90_seconds": get_percentile(durations, 90),
+                    "p99_seconds": get_percentile(durations, 99),
+                }
+            return {
+                "seconds": time.perf_counter() - self._start,
+                "peak_rss": get_peak_rss(),
+                "totals": totals,
+                "stages": stages,
+                "plans": self.plans,
+                "batches": self.batches,
+                "countries": self.countries,
+            }
+
+    def save(self, path: str) -> None:
+        """Save report as JSON and log a summary of the stages.
+
+        Args:
+            path (str): Path of JSON file
+
+        Returns:
+            None
+        """
+        report = self.to_dict()
+        save_json(report, path)
+        for stage, stats in report["stages"].items():
+            logger.info(
+                f"{stage}: {stats['count']} calls, {stats['seconds']:.1f}s total, "
+                f"{stats['max_seconds']:.1f}s max"
+            )
+        logger.info(f"Run report with peak RSS {report['peak_rss']} saved to {path}")
@@ -0,0 +1,90 @@
+"""Internal data model of plans and countries"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass(slots=True)
+class Plan:
+    """A response plan that has passed filtering, with the results of
+    downloading its projects once they are available.
+
+    Args:
+        code (str): Plan code
+        name (Optional[str]): Plan name
+        start (Optional[str]): Start date as in the API
+        end (Optional[str]): End date as in the API
+        start_date (datetime): Parsed start date
+        end_date (datetime): Parsed end date
+        url (str): Url of JSON of all of the plan's projects
+        iso3s (Tuple[str, ...]): ISO3s of countries in plan
+        year (int): Latest year of plan
+        is_hrp (bool): Whether plan is a current year HRP
+        is_gho (bool): Whether plan is in the current year GHO
+        fingerprint (str): Fingerprint of plan
+        csv_path (Optional[str]): Path of plan CSV. Defaults to None (no projects).
+        csv_files (Dict[str, str]): Mapping from ISO3 to path of country CSV
+        projects_fingerprint (Optional[str]): Fingerprint of projects. Defaults to None.
+        rows (int): Number of projects. Defaults to 0.
+    """
+
+    code: str
+    name: Optional[str]
+    start: Optional[str]
+    end: Optional[str]
+    start_date: datetime
+    end_date: datetime
+    url: str
+    iso3s: Tuple[str, ...]
+    year: int
+    is_hrp: bool
+    is_gho: bool
+    fingerprint: str
+    csv_path: Optional[str] = None
+    csv_files: Dict[str, str] = field(default_factory=dict)
+    projects_fingerprint: Optional[str] = None
+    rows: int = 0
+
+    @property
+    def has_projects(self) -> bool:
+        return self.csv_path is not None
+
+
+@dataclass(slots=True)
+class CountryIndex:
+    """The plans with projects that include a country in the order they were
+    added, with the earliest and latest plan dates kept up to date as plans
+    are added.
+
+    Args:
+        iso3 (str): Country ISO3
+        plans (List[Plan]): Plans including the country
+        start_date (Optional[datetime]): Earliest plan date. Defaults to None.
+        end_date (Optional[datetime]): Latest plan date. Defaults to None.
+    """
+
+    iso3: str
+    plans: List[Plan] = field(default_factory=list)
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+    def add_plan(self, plan: Plan) -> None:
+        """Add plan to country updating the earliest and latest dates.
+
+        Args:
+            plan (Plan): Plan to add
+
+        Returns:
+            None
+        """
+        self.plans.append(plan)
+        for date in (plan.start_date, plan.end_date):
+            if self.start_date is None or date < self.start_date:
+                self.start_date = date
+            if self.end_date is None or date > self.end_date:
+                self.end_date = date
+
+    @property
+    def plan_codes(self) -> List[str]:
+        return [plan.code for plan in self.plans]
@@ -0,0 +1,170 @@
+"""Staged pipeline with a pool of worker threads per stage"""
+
+import logging
+import threading
+from queue import Empty, Full, Queue
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+_SKIP = object()
+
+
+class Stage(NamedTuple):
+    """A pipeline stage. The function is called with the output of the
+    previous stage and returning None drops the item from the pipeline.
+
+    Args:
+        name (str): Name of stage used in thread names
+        function (Callable[[Any], Any]): Function to apply to each item
+        workers (int): Number of worker threads. Defaults to 1.
+    """
+
+    name: str
+    function: Callable[[Any], Any]
+    workers: int = 1
+
+
+class Pipeline:
+    """Run items through a sequence of stages. Each stage has its own pool of
+    worker threads and consecutive stages are connected by bounded queues, so
+    that different items can be in different stages at the same time while
+    the number of items waiting between stages stays bounded. Results are
+    yielded in the order of the input items regardless of the order in which
+    they finish. An exception in any stage stops the pipeline and is raised
+    by run.
+
+    Args:
+        stages (Iterable[Stage]): Stages to run in order
+        queue_size (int): Maximum number of items waiting before each stage. Defaults to 8.
+    """
+
+    def __init__(self, stages: Iterable[Stage], queue_size: int = 8):
+        self._stages = [
+            stage._replace(workers=max(1, stage.workers)) for stage in stages
+        ]
+        self._queue_size = max(1, queue_size)
+
+    @staticmethod
+    def _put(queue: Queue, item: Any, abort: threading.Event) -> bool:
+        while not abort.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(queue: Queue, abort: threading.Event) -> Any:
+        while not abort.is_set():
+            try:
+                return queue.get(timeout=0.1)
+            except Empty:
+                continue
+        return _DONE
+
+    def run(self, items: Iterable) -> Iterator:
+        """Run items through the pipeline.
+
+        Args:
+            items (Iterable): Items to feed into the first stage
+
+        Returns:
+            Iterator: Results of the last stage in input order
+        """
+        abort = threading.Event()
+        errors: List[BaseException] = []
+        queues = [Queue(self._queue_size) for _ in self._stages]
+        output = Queue()
+        threads = []
+        lock = threading.Lock()
+
+        def fail(err: BaseException) -> None:
+            errors.append(err)
+            abort.set()
+            output.put(_DONE)
+
+        def feed() -> None:
+            try:
+                count = 0
+                for index, item in enumerate(items):
+                    if not self._put(queues[0], (index, item), abort):
+                        return
+                    count += 1
+                output.put((count, _DONE))
+            except BaseException as err:
+                fail(err)
+                return
+            self._put(queues[0], _DONE, abort)
+
+        def work(stage_no: int, stage: Stage, finished: List[int]) -> None:
+            in_queue = queues[stage_no]
+            last = stage_no == len(self._stages) - 1
+            while True:
+                entry = self._get(in_queue, abort)
+                if entry is _DONE:
+                    # pass the end marker on to the other workers of this stage
+                    # and, once all have finished, to the next stage
+                    self._put(in_queue, _DONE, abort)
+                    with lock:
+                        finished[0] += 1
+                        all_finished = finished[0] == stage.workers
+                    if all_finished and not last:
+                        self._put(queues[stage_no + 1], _DONE, abort)
+                    return
+                index, item = entry
+                if item is not _SKIP:
+                    try:
+                        item = stage.function(item)
+                    except BaseException as err:
+                        fail(err)
+                        return
+                    if item is None:
+                        item = _SKIP
+                if last:
+                    output.put((index, item))
+                elif not self._put(queues[stage_no + 1], (index, item), abort):
+                    return
+
+        threads.append(threading.Thread(target=feed, name="pipeline-feed"))
+        for stage_no, stage in enumerate(self._stages):
+            finished = [0]
+            for i in range(stage.workers):
+                threads.append(
+                    threading.Thread(
+                        target=work,
+                        args=(stage_no, stage, finished),
+                        name=f"pipeline-{stage.name}-{i}",
+                    )
+                )
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        pending = {}
+        next_index = 0
+        total = None
+        try:
+            while total is None or next_index < total:
+                entry = output.get()
+                if entry is _DONE or abort.is_set():
+                    break
+                index, item = entry
+                if item is _DONE:
+                    total = index
+                    continue
+                pending[index] = item
+                while next_index in pending:
+                    item = pending.pop(next_index)
+                    next_index += 1
+                    if item is not _SKIP:
+                        yield item
+        finally:
+            if total is None or next_index < total:
+                abort.set()
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
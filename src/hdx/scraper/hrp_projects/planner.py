@@ -0,0 +1,169 @@
+"""Planning of project search requests: batching plans and sizing pages"""
+
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from hdx.scraper.hrp_projects.model import Plan
+
+logger = logging.getLogger(__name__)
+
+
+def batch_plans(
+    plans: Iterable[Plan],
+    max_plans: int,
+    max_rows: int,
+    get_previous_rows: Callable[[str], Optional[int]],
+) -> List[List[Plan]]:
+    """Group consecutive plans into batches that are downloaded with one
+    project search. Only plans that had at most max_rows projects in the last
+    run are batched. Plans whose size is not known, such as in a first run or
+    a full refresh, are downloaded on their own so that large plans are still
+    downloaded concurrently.
+
+    Args:
+        plans (Iterable[Plan]): Plans in order
+        max_plans (int): Maximum number of plans in a batch
+        max_rows (int): Maximum number of projects of a plan to batch it
+        get_previous_rows (Callable[[str], Optional[int]]): Function returning number of projects of a plan in the last run or None
+
+    Returns:
+        List[List[Plan]]: Batches of plans in order
+    """
+    batches = []
+    batch = []
+    for plan in plans:
+        rows = get_previous_rows(plan.code)
+        if max_plans <= 1 or rows is None or rows > max_rows:
+            batches.append([plan])
+            continue
+        batch.append(plan)
+        if len(batch) == max_plans:
+            batches.append(batch)
+            batch = []
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def split_projects(
+    projects: Iterable[Dict], plan_codes: Sequence[str]
+) -> Dict[str, List[Dict]]:
+    """Split the results of a project search for several plans by the plans
+    field of each project. A project in more than one of the plans goes to
+    each of them.
+
+    Args:
+        projects (Iterable[Dict]): Project records from HPC API
+        plan_codes (Sequence[str]): Codes of the plans searched
+
+    Returns:
+        Dict[str, List[Dict]]: Mapping from plan code to its projects in order
+    """
+    split = {plan_code: [] for plan_code in plan_codes}
+    for project in projects:
+        found = False
+        for plan_code in dict.fromkeys(
+            plan["code"] for plan in project.get("plans") or ()
+        ):
+            plan_projects = split.get(plan_code)
+            if plan_projects is not None:
+                plan_projects.append(project)
+                found = True
+        if not found:
+            logger.warning(
+                f"Project {project.get('id')} is not in any of {', '.join(plan_codes)}"
+            )
+    return split
+
+
+class PageSizer:
+    """Choose the number of projects to request per page of a project search
+    from the time taken and size of the pages downloaded so far, so that each
+    page takes about target_seconds and has at most target_bytes. The page
+    size stays between minimum and maximum and is a multiple of minimum. If
+    the API returns fewer projects per page than requested, that becomes the
+    maximum. It is safe to use from multiple threads.
+
+    Args:
+        initial (int): Page size before any pages are downloaded. Defaults to 500.
+        minimum (int): Minimum page size. Defaults to 100.
+        maximum (int): Maximum page size. Defaults to 1000.
+        target_seconds (float): Target time to download a page. Defaults to 2.
+        target_bytes (int): Maximum size of a page in bytes. Defaults to 10 MB.
+        adaptive (bool): Adjust page size. Defaults to True.
+    """
+
+    # weight given to the latest page in the moving averages
+    _SMOOTHING = 0.3
+
+    def __init__(
+        self,
+        initial: int = 500,
+        minimum: int = 100,
+        maximum: int = 1000,
+        target_seconds: float = 2,
+        target_bytes: int = 10000000,
+        adaptive: bool = True,
+    ):
+        self._limit = initial
+        self._minimum = max(1, minimum)
+        self._maximum = max(self._minimum, maximum)
+        self._target_seconds = target_seconds
+        self._target_bytes = target_bytes
+        self._adaptive = adaptive
+        self._seconds_per_row = None
+        self._bytes_per_row = None
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        with self._lock:
+            return self._limit
+
+    def _average(self, average: Optional[float], value: float) -> float:
+        if average is None:
+            return value
+        return average + self._SMOOTHING * (value - average)
+
+    def set_server_limit(self, limit: int) -> None:
+        """Record the page size returned by the API when it is less than the
+        page size requested. The page size is only lowered to it if the page
+        size is adaptive, since otherwise every request must use the same url
+        so that saved data can be used.
+
+        Args:
+            limit (int): Page size returned by the API
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if limit < self._maximum:
+                logger.info(f"Project search pages are limited to {limit} projects")
+                self._maximum = limit
+                self._minimum = min(self._minimum, limit)
+                if self._adaptive:
+                    self._limit = min(self._limit, limit)
+
+    def observe(self, rows: int, seconds: float, size: Optional[int]) -> None:
+        """Update the page size from a downloaded page.
+
+        Args:
+            rows (int): Number of projects in page
+            seconds (float): Time taken to download page
+            size (Optional[int]): Size of page in bytes if known
+
+        Returns:
+            None
+        """
+        if not self._adaptive or rows == 0:
+            return
+        with self._lock:
+            self._seconds_per_row = self._average(self._seconds_per_row, seconds / rows)
+            limit = self._target_seconds / self._seconds_per_row
+            if size is not None:
+                self._bytes_per_row = self._average(self._bytes_per_row, size / rows)
+                limit = min(limit, self._target_bytes / self._bytes_per_row)
+            limit = int(limit) // self._minimum * self._minimum
+            self._limit = max(self._minimum, min(self._maximum, limit))
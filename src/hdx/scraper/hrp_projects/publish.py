@@ -0,0 +1,176 @@
+"""Publishing of datasets to HDX with change detection"""
+
+import json
+import logging
+import threading
+from hashlib import sha256
+from os import makedirs, replace, stat
+from os.path import dirname, exists
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+from hdx.utilities.loader import load_json
+from hdx.utilities.saver import save_json
+
+if TYPE_CHECKING:
+    from hdx.data.dataset import Dataset
+
+logger = logging.getLogger(__name__)
+
+
+class Publisher:
+    """Publish datasets to HDX unless they are unchanged since they were last
+    published. Each resource file is hashed the same way as HDX hashes it for
+    the hash field of the resource, and the hashes are compared with those
+    recorded locally when the dataset was last published, along with a hash
+    of the dataset and resource metadata. Unchanged datasets are skipped
+    without any HDX requests. When a dataset has changed, HDX compares the
+    file hashes with the hash field of its resources so only changed files
+    are uploaded. Hashes are recorded as soon as a dataset is published. It is
+    safe to use from multiple threads so datasets can be published by a
+    bounded pool of workers.
+
+    Args:
+        path (str): Path of JSON file of published hashes
+        create (Callable[[Dataset], Any]): Function that creates or updates dataset in HDX
+        full_refresh (bool): Ignore published hashes. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        create: Callable[["Dataset"], Any],
+        full_refresh: bool = False,
+    ):
+        self._path = path
+        self._create = create
+        self._published = {}
+        if not full_refresh and exists(path):
+            self._published = load_json(path)
+        self._file_hashes: Dict[Tuple, str] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.unchanged = 0
+        self.changed_resources = 0
+        self.unchanged_resources = 0
+
+    def _get_file_hash(self, path: str, file_format: str) -> str:
+        # plan CSVs are hard linked between countries so each is hashed once
+        file_stat = stat(path)
+        key = (
+            file_stat.st_dev,
+            file_stat.st_ino,
+            file_stat.st_size,
+            file_stat.st_mtime_ns,
+        )
+        with self._lock:
+            file_hash = self._file_hashes.get(key)
+        if file_hash is None:
+            # file_hashing imports openpyxl so it is only imported if needed
+            from hdx.utilities.file_hashing import get_size_and_hash
+
+            _, file_hash = get_size_and_hash(path, file_format)
+            with self._lock:
+                self._file_hashes[key] = file_hash
+        return file_hash
+
+    def get_hashes(self, dataset: "Dataset") -> Dict:
+        """Get hash of dataset and resource metadata and hashes of resource
+        files.
+
+        Args:
+            dataset (Dataset): Dataset
+
+        Returns:
+            Dict: Hashes of metadata and resource files
+        """
+        resources = dataset.get_resources()
+        files = {}
+        for resource in resources:
+            path = resource.get_file_to_upload()
+            if path:
+                files[resource["name"]] = self._get_file_hash(
+                    path, resource.get_format() or ""
+                )
+        metadata = {
+            "dataset": dataset.data,
+            "resources": [resource.data for resource in resources],
+        }
+        metadata_hash = sha256(
+            json.dumps(metadata, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return {"metadata": metadata_hash, "files": files}
+
+    def publish(self, dataset: "Dataset") -> bool:
+        """Publish dataset in HDX if it has changed since it was last
+        published.
+
+        Args:
+            dataset (Dataset): Dataset
+
+        Returns:
+            bool: True if dataset was published
+        """
+        name = dataset["name"]
+        hashes = self.get_hashes(dataset)
+        with self._lock:
+            published = self._published.get(name)
+        if published == hashes:
+            logger.info(f"Not publishing {name} (unchanged)")
+            with self._lock:
+                self.unchanged += 1
+                self.unchanged_resources += len(hashes["files"])
+            return False
+        published_files = published["files"] if published else {}
+        changed = [
+            resource_name
+            for resource_name, file_hash in hashes["files"].items()
+            if published_files.get(resource_name) != file_hash
+        ]
+        logger.info(
+            f"Publishing {name} with {len(changed)} of {len(hashes['files'])} "
+            f"resource files changed"
+        )
+        self._create(dataset)
+        with self._lock:
+            self.published += 1
+            self.changed_resources += len(changed)
+            self.unchanged_resources += len(hashes["files"]) - len(changed)
+            self._published[name] = hashes
+            self._save()
+        return True
+
+    def _save(self) -> None:
+        folder = dirname(self._path)
+        if folder:
+            makedirs(folder, exist_ok=True)
+        temp_path = f"{self._path}.tmp"
+        save_json(self._published, temp_path)
+        replace(temp_path, self._path)
+
+    def log_statistics(self) -> None:
+        """Log numbers of published and unchanged datasets and resources.
+
+        Returns:
+            None
+        """
+        logger.info(
+            f"Published {self.published} datasets, {self.unchanged} unchanged. "
+            f"{self.changed_resources} resource files changed, "
+            f"{self.unchanged_resources} unchanged"
+        )
+
+
+def get_hdx_create(**kwargs: Any) -> Callable[["Dataset"], Optional[Dict]]:
+    """Get function that creates or updates a dataset in HDX.
+
+    Args:
+        **kwargs: Keyword arguments to pass to Dataset.create_in_hdx
+
+    Returns:
+        Callable[[Dataset], Optional[Dict]]: Function calling create_in_hdx
+    """
+
+    def create(dataset: "Dataset") -> Optional[Dict]:
+        return dataset.create_in_hdx(**kwargs)
+
+    return create
@@ -0,0 +1,101 @@
+"""Rendering of project records as CSV text in a pool of processes"""
+
+import csv
+import io
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from hdx.scraper.hrp_projects.transform import RowTransformer
+
+logger = logging.getLogger(__name__)
+
+
+def _format_rows(rows: List[Tuple]) -> str:
+    output = io.StringIO()
+    csv.writer(output).writerows(rows)
+    return output.getvalue()
+
+
+class CSVRenderer:
+    """Flatten project records and format them as CSV rows. Formatting can
+    be spread across a pool of processes so that rendering the pages of
+    several plans at once is not limited by the GIL. Records are flattened in
+    the calling thread since pickling the nested records to send them to a
+    process costs about as much as flattening them, so each task is one page
+    of flattened rows (tuples of strings and numbers) for one plan. The
+    result is the CSV text of the rows, which is the same as writing the rows
+    with a csv writer so files are unchanged. Pages can be submitted without
+    waiting for them to be formatted so that each calling thread keeps several
+    processes busy. Rendering is safe to call from multiple threads.
+
+    Args:
+        headers (Sequence[str]): CSV headers
+        processes (int): Number of worker processes. Defaults to 0 (render in calling thread).
+    """
+
+    def __init__(self, headers: Sequence[str], processes: int = 0):
+        self._headers = tuple(headers)
+        self.processes = max(0, processes)
+        self._transformer = RowTransformer(self._headers)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "CSVRenderer":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.close()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    # forking a process with download threads running is unsafe
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def submit(self, plan_code: str, projects: List[Dict]) -> Future[str]:
+        """Start rendering project records as CSV rows. Without worker
+        processes, the rows are rendered before returning.
+
+        Args:
+            plan_code (str): Plan code
+            projects (List[Dict]): Project records from HPC API
+
+        Returns:
+            Future[str]: Future of CSV text of rows
+        """
+        rows = list(self._transformer.transform(plan_code, projects))
+        if self.processes == 0 or not rows:
+            future = Future()
+            future.set_result(_format_rows(rows))
+            return future
+        return self._get_executor().submit(_format_rows, rows)
+
+    def render(self, plan_code: str, projects: List[Dict]) -> str:
+        """Render project records as CSV rows.
+
+        Args:
+            plan_code (str): Plan code
+            projects (List[Dict]): Project records from HPC API
+
+        Returns:
+            str: CSV text of rows
+        """
+        return self.submit(plan_code, projects).result()
+
+    def close(self) -> None:
+        """Shut down worker processes.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
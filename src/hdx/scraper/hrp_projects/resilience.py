@@ -0,0 +1,249 @@
+"""Retries, rate limiting and circuit breaking of HPC API requests"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+from hdx.utilities.base_downloader import DownloadError
+from requests import HTTPError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(DownloadError):
+    """Raised instead of making a request while the circuit breaker is open"""
+
+
+def is_retriable(error: Exception) -> bool:
+    """Check if a failed request may succeed if retried. Download errors are
+    retried unless they were caused by an HTTP error status other than 429
+    (too many requests) or 5xx.
+
+    Args:
+        error (Exception): Error raised by request
+
+    Returns:
+        bool: True if request should be retried
+    """
+    if not isinstance(error, DownloadError) or isinstance(error, CircuitOpenError):
+        return False
+    cause = error.__cause__
+    while cause is not None:
+        if isinstance(cause, HTTPError) and cause.response is not None:
+            status = cause.response.status_code
+            return status == 429 or status >= 500
+        cause = cause.__cause__
+    return True
+
+
+class RateLimiter:
+    """Token bucket limiting the rate of requests across threads, allowing
+    bursts of up to burst requests.
+
+    Args:
+        rate (float): Requests per second. 0 means unlimited.
+        burst (int): Maximum number of requests in a burst. Defaults to 1.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self._rate = rate
+        self._burst = max(1, burst)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Wait until a request can be made.
+
+        Returns:
+            None
+        """
+        if self._rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._burst, self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            # take the token now and wait for it outside the lock so that
+            # waiting threads are served in turn
+            self._tokens -= 1
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Stop making requests after failure_threshold consecutive failures.
+    Once reset_seconds have passed, one trial request is allowed and the
+    breaker closes again if it succeeds.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the breaker. 0 disables it.
+        reset_seconds (float): Seconds before a trial request. Defaults to 60.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float = 60):
+        self._failure_threshold = failure_threshold
+        self._reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened is not None
+
+    def before_request(self) -> None:
+        """Check that a request can be made.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._opened is None:
+                return
+            if self._trial or time.monotonic() - self._opened < self._reset_seconds:
+                raise CircuitOpenError(
+                    f"Stopped requests after {self._failures} consecutive failures"
+                )
+            self._trial = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened is not None:
+                logger.info("Requests are succeeding again")
+            self._failures = 0
+            self._opened = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial or (
+                self._failure_threshold
+                and self._opened is None
+                and self._failures >= self._failure_threshold
+            ):
+                logger.error(
+                    f"Stopping requests for {self._reset_seconds}s after "
+                    f"{self._failures} consecutive failures"
+                )
+                self._opened = time.monotonic()
+                self._trial = False
+
+
+class RetryPolicy:
+    """Make requests with retries using jittered exponential backoff, a rate
+    limit and a circuit breaker shared by all of the threads making requests.
+
+    Args:
+        retries (int): Maximum number of retries of a request. Defaults to 5.
+        backoff_seconds (float): Base of exponential backoff. Defaults to 1.
+        max_backoff_seconds (float): Maximum wait between retries. Defaults to 60.
+        requests_per_second (float): Rate limit. Defaults to 0 (unlimited).
+        burst (int): Maximum number of requests in a burst. Defaults to 1.
+        breaker_failures (int): Consecutive failures that stop requests. Defaults to 0 (never).
+        breaker_reset_seconds (float): Seconds before requests are tried again. Defaults to 60.
+    """
+
+    # keyword arguments of Download that turn off the retries of its session.
+    # Otherwise requests are retried by both the session and the policy and
+    # failures after the session's retries arrive as a RetryError without the
+    # HTTP error status that decides whether the policy retries them
+    session_kwargs = {"retry_attempts": 0, "status_forcelist": ()}
+
+    def __init__(
+        self,
+        retries: int = 5,
+        backoff_seconds: float = 1,
+        max_backoff_seconds: float = 60,
+        requests_per_second: float = 0,
+        burst: int = 1,
+        breaker_failures: int = 0,
+        breaker_reset_seconds: float = 60,
+    ):
+        self._retries = retries
+        self._backoff_seconds = backoff_seconds
+        self._max_backoff_seconds = max_backoff_seconds
+        self.rate_limiter = RateLimiter(requests_per_second, burst)
+        self.circuit_breaker = CircuitBreaker(breaker_failures, breaker_reset_seconds)
+        self._lock = threading.Lock()
+        self.retried = 0
+
+    @classmethod
+    def from_configuration(cls, configuration: Optional[dict]) -> "RetryPolicy":
+        """Create RetryPolicy from the fetch section of the configuration.
+
+        Args:
+            configuration (Optional[dict]): Fetch configuration
+
+        Returns:
+            RetryPolicy: Retry policy
+        """
+        if not configuration:
+            return cls()
+        return cls(
+            retries=configuration.get("retries", 5),
+            backoff_seconds=configuration.get("backoff_seconds", 1),
+            max_backoff_seconds=configuration.get("max_backoff_seconds", 60),
+            requests_per_second=configuration.get("requests_per_second", 0),
+            burst=configuration.get("burst", 1),
+            breaker_failures=configuration.get("breaker_failures", 0),
+            breaker_reset_seconds=configuration.get("breaker_reset_seconds", 60),
+        )
+
+    def get_backoff(self, attempt: int) -> float:
+        """Get time to wait before a retry using full jitter.
+
+        Args:
+            attempt (int): Number of the retry starting from 0
+
+        Returns:
+            float: Seconds to wait
+        """
+        backoff = min(self._max_backoff_seconds, self._backoff_seconds * 2**attempt)
+        return random.uniform(0, backoff)
+
+    def call(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call function making a request, retrying it if it fails with a
+        retriable error.
+
+        Args:
+            function (Callable[..., T]): Function making a request
+            *args: Arguments to pass to function
+            **kwargs: Keyword arguments to pass to function
+
+        Returns:
+            T: Return value of function
+        """
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_request()
+            self.rate_limiter.acquire()
+            try:
+                result = function(*args, **kwargs)
+            except Exception as error:
+                if not is_retriable(error):
+                    raise
+                self.circuit_breaker.record_failure()
+                if attempt >= self._retries:
+                    raise
+                backoff = self.get_backoff(attempt)
+                logger.warning(
+                    f"{error} (retry {attempt + 1} of {self._retries} in {backoff:.1f}s)"
+                )
+                with self._lock:
+                    self.retried += 1
+                time.sleep(backoff)
+                attempt += 1
+                continue
+            self.circuit_breaker.record_success()
+            return result
@@ -0,0 +1,49 @@
+"""Spooling of CSV rows to disk"""
+
+import csv
+import logging
+from typing import Any, Optional, Sequence, TextIO
+
+logger = logging.getLogger(__name__)
+
+
+class CSVSpool:
+    """Write rows to a CSV file as they arrive so that they do not have to be
+    held in memory. The output matches the CSV written by
+    Dataset.generate_resource.
+
+    Args:
+        path (str): Path of CSV file to write
+        headers (Sequence[str]): Header row
+        encoding (str): Encoding of file. Defaults to "utf-8-sig".
+    """
+
+    def __init__(self, path: str, headers: Sequence[str], encoding: str = "utf-8-sig"):
+        self._path = path
+        self._headers = headers
+        self._encoding = encoding
+        self._file: Optional[TextIO] = None
+        self.rows = 0
+
+    def __enter__(self) -> "CSVSpool":
+        self._file = open(self._path, "w", encoding=self._encoding, newline="")
+        csv.writer(self._file).writerow(self._headers)
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def write_text(self, text: str, rows: int) -> None:
+        """Append rows already formatted as CSV text to the CSV file.
+
+        Args:
+            text (str): CSV text of rows
+            rows (int): Number of rows in text
+
+        Returns:
+            None
+        """
+        self._file.write(text)
+        self.rows += rows
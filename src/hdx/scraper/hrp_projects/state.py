@@ -0,0 +1,218 @@
+"""Persistent state of plans between runs"""
+
+import logging
+import threading
+import time
+from os import listdir, makedirs, remove, replace
+from os.path import exists, join
+from shutil import copyfile, rmtree
+from typing import Dict, Optional
+
+from hdx.utilities.loader import load_json
+from hdx.utilities.saver import save_json
+
+logger = logging.getLogger(__name__)
+
+
+class PlanState:
+    """Fingerprints of the plans and projects seen in the last successful run
+    along with a copy of each plan's CSV, so that unchanged plans do not need
+    to be downloaded. Changes are only written to disk by save.
+
+    Plans downloaded in a run are also checkpointed to disk straight away so
+    that if the run fails, the next run can resume without downloading them
+    again. Checkpoints are removed by save and ignored once they are older
+    than checkpoint_max_age or in a full refresh.
+
+    Args:
+        folder (str): Folder in which to keep state
+        full_refresh (bool): Ignore state from the last successful run and checkpoints. Defaults to False.
+        checkpoint_max_age (float): Seconds for which checkpoints are used. Defaults to 86400.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        full_refresh: bool = False,
+        checkpoint_max_age: float = 86400,
+    ):
+        self._folder = folder
+        self._csv_folder = join(folder, "csv")
+        self._path = join(folder, "state.json")
+        self._state = {"plans": {}}
+        if not full_refresh and exists(self._path):
+            self._state = load_json(self._path)
+        self._new_state = {"plans": {}}
+        self._new_csvs = {}
+        self._checkpoint_folder = join(folder, "checkpoint")
+        self._checkpoint_path = join(self._checkpoint_folder, "checkpoint.json")
+        self._checkpoint = {"created": time.time(), "plans": {}}
+        self._checkpoint_lock = threading.Lock()
+        if not full_refresh and exists(self._checkpoint_path):
+            checkpoint = load_json(self._checkpoint_path)
+            if time.time() - checkpoint["created"] < checkpoint_max_age:
+                logger.info(
+                    f"Resuming from checkpoint of {len(checkpoint['plans'])} plans"
+                )
+                self._checkpoint = checkpoint
+
+    def get_csv_path(self, plan_code: str) -> str:
+        """Get path of stored CSV for plan.
+
+        Args:
+            plan_code (str): Plan code
+
+        Returns:
+            str: Path of stored CSV
+        """
+        return join(self._csv_folder, f"{plan_code.lower()}-projects.csv")
+
+    def get_plan(self, plan_code: str) -> Optional[Dict]:
+        """Get state of plan from the last run.
+
+        Args:
+            plan_code (str): Plan code
+
+        Returns:
+            Optional[Dict]: Fingerprints of plan and its projects or None
+        """
+        return self._state["plans"].get(plan_code)
+
+    def is_plan_unchanged(self, plan_code: str, fingerprint: str) -> bool:
+        """Check if plan fingerprint is the same as in the last run and the
+        plan's CSV is stored.
+
+        Args:
+            plan_code (str): Plan code
+            fingerprint (str): Fingerprint of plan
+
+        Returns:
+            bool: True if plan is unchanged
+        """
+        plan = self.get_plan(plan_code)
+        if plan is None or plan["fingerprint"] != fingerprint:
+            return False
+        return exists(self.get_csv_path(plan_code))
+
+    def set_plan(
+        self,
+        plan_code: str,
+        fingerprint: str,
+        projects_fingerprint: str,
+        csv_path: str,
+        rows: Optional[int] = None,
+    ) -> None:
+        """Record state of plan for the next run.
+
+        Args:
+            plan_code (str): Plan code
+            fingerprint (str): Fingerprint of plan
+            projects_fingerprint (str): Fingerprint of plan's projects
+            csv_path (str): Path of plan's CSV
+            rows (Optional[int]): Number of projects in plan. Defaults to None.
+
+        Returns:
+            None
+        """
+        self._new_state["plans"][plan_code] = {
+            "fingerprint": fingerprint,
+            "projects": projects_fingerprint,
+            "rows": rows,
+        }
+        self._new_csvs[plan_code] = csv_path
+
+    def get_checkpoint_csv_path(self, plan_code: str) -> str:
+        """Get path of checkpointed CSV for plan.
+
+        Args:
+            plan_code (str): Plan code
+
+        Returns:
+            str: Path of checkpointed CSV
+        """
+        return join(self._checkpoint_folder, f"{plan_code.lower()}-projects.csv")
+
+    def get_checkpoint(self, plan_code: str, fingerprint: str) -> Optional[Dict]:
+        """Get checkpoint of plan from a failed run if the plan fingerprint is
+        unchanged and the plan's CSV is checkpointed.
+
+        Args:
+            plan_code (str): Plan code
+            fingerprint (str): Fingerprint of plan
+
+        Returns:
+            Optional[Dict]: Fingerprints and rows of plan or None
+        """
+        with self._checkpoint_lock:
+            plan = self._checkpoint["plans"].get(plan_code)
+        if plan is None or plan["fingerprint"] != fingerprint:
+            return None
+        if not exists(self.get_checkpoint_csv_path(plan_code)):
+            return None
+        return plan
+
+    def checkpoint_plan(
+        self,
+        plan_code: str,
+        fingerprint: str,
+        projects_fingerprint: str,
+        csv_path: str,
+        rows: int,
+    ) -> None:
+        """Checkpoint downloaded plan to disk.
+
+        Args:
+            plan_code (str): Plan code
+            fingerprint (str): Fingerprint of plan
+            projects_fingerprint (str): Fingerprint of plan's projects
+            csv_path (str): Path of plan's CSV
+            rows (int): Number of projects in plan
+
+        Returns:
+            None
+        """
+        makedirs(self._checkpoint_folder, exist_ok=True)
+        checkpoint_csv_path = self.get_checkpoint_csv_path(plan_code)
+        temp_path = f"{checkpoint_csv_path}.tmp"
+        copyfile(csv_path, temp_path)
+        replace(temp_path, checkpoint_csv_path)
+        with self._checkpoint_lock:
+            self._checkpoint["plans"][plan_code] = {
+                "fingerprint": fingerprint,
+                "projects": projects_fingerprint,
+                "rows": rows,
+            }
+            temp_path = f"{self._checkpoint_path}.tmp"
+            save_json(self._checkpoint, temp_path)
+            replace(temp_path, self._checkpoint_path)
+
+    def save(self) -> None:
+        """Save recorded state, replacing the state from the last run, and
+        remove checkpoints and the stored CSVs of plans that are no longer in
+        the state, for example because they are before the cutoff year.
+
+        Returns:
+            None
+        """
+        makedirs(self._csv_folder, exist_ok=True)
+        stored_paths = set()
+        for plan_code, csv_path in self._new_csvs.items():
+            stored_path = self.get_csv_path(plan_code)
+            stored_paths.add(stored_path)
+            if csv_path != stored_path:
+                temp_path = f"{stored_path}.tmp"
+                copyfile(csv_path, temp_path)
+                replace(temp_path, stored_path)
+        temp_path = f"{self._path}.tmp"
+        save_json(self._new_state, temp_path)
+        replace(temp_path, self._path)
+        for filename in listdir(self._csv_folder):
+            path = join(self._csv_folder, filename)
+            if path not in stored_paths:
+                remove(path)
+        self._state = self._new_state
+        self._new_state = {"plans": {}}
+        self._new_csvs = {}
+        with self._checkpoint_lock:
+            rmtree(self._checkpoint_folder, ignore_errors=True)
+            self._checkpoint = {"created": time.time(), "plans": {}}
@@ -0,0 +1,122 @@
+"""Flattening of HPC project records into CSV rows"""
+
+import logging
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PLAN_CODE_HEADER = "Response plan code"
+
+
+def _get_locations(row: Dict) -> Optional[List[str]]:
+    locations = row.get("locations")
+    if locations is None:
+        return None
+    return [location["iso3"] for location in locations if location["iso3"]]
+
+
+def _get_clusters(row: Dict) -> Optional[List[str]]:
+    clusters = row.get("globalClusters")
+    if clusters is None:
+        return None
+    return [cluster["name"] for cluster in clusters]
+
+
+def _get_organizations(row: Dict) -> Optional[List[str]]:
+    organizations = row.get("organizations")
+    if organizations is None:
+        return None
+    return [organization["name"] for organization in organizations]
+
+
+def _get_plans(row: Dict) -> Optional[List[str]]:
+    plans = row.get("plans")
+    if plans is None:
+        return None
+    # a plan appears once per category so remove duplicates keeping order
+    return list(dict.fromkeys([plan["name"] for plan in plans]))
+
+
+# functions extracting the values of list columns, shared by the CSV rows and
+# the columnar export
+LIST_COLUMNS: Dict[str, Callable[[Dict], Optional[List[str]]]] = {
+    "locations": _get_locations,
+    "globalClusters": _get_clusters,
+    "organizations": _get_organizations,
+    "plans": _get_plans,
+}
+
+
+def _make_joiner(
+    get_values: Callable[[Dict], Optional[List[str]]],
+) -> Callable[[Dict], Optional[str]]:
+    def joiner(row: Dict) -> Optional[str]:
+        values = get_values(row)
+        if values is None:
+            return None
+        return ", ".join(values)
+
+    return joiner
+
+
+_JOINED_COLUMNS = {
+    header: _make_joiner(get_values) for header, get_values in LIST_COLUMNS.items()
+}
+
+
+class RowTransformer:
+    """Flatten HPC project records into CSV rows. The function that extracts
+    each column is chosen once from the headers rather than for every key of
+    every project. Rows are tuples in header order. List columns are joined
+    with commas, keeping the order of the API, and the plan code is put in the
+    "Response plan code" column.
+
+    Args:
+        headers (Sequence[str]): CSV headers
+    """
+
+    def __init__(self, headers: Sequence[str]):
+        self.headers = tuple(headers)
+        getters: List[Callable[[Dict], object]] = []
+        self._plan_code_index = None
+        for i, header in enumerate(self.headers):
+            if header == PLAN_CODE_HEADER:
+                self._plan_code_index = i
+                getters.append(_none)
+            elif header in _JOINED_COLUMNS:
+                getters.append(_JOINED_COLUMNS[header])
+            else:
+                getters.append(_make_getter(header))
+        self._getters = tuple(getters)
+
+    def transform(self, plan_code: str, rows: Iterable[Dict]) -> Iterator[Tuple]:
+        """Flatten project records.
+
+        Args:
+            plan_code (str): Plan code
+            rows (Iterable[Dict]): Project records from HPC API
+
+        Returns:
+            Iterator[Tuple]: CSV rows in header order
+        """
+        getters = self._getters
+        index = self._plan_code_index
+        if index is None:
+            for row in rows:
+                yield tuple([getter(row) for getter in getters])
+            return
+        for row in rows:
+            values = [getter(row) for getter in getters]
+            values[index] = plan_code
+            yield tuple(values)
+
+
+def _none(row: Dict) -> None:
+    return None
+
+
+def _make_getter(header: str) -> Callable[[Dict], object]:
+    def getter(row: Dict) -> object:
+        return row.get(header)
+
+    return getter
@@ -0,0 +1,90 @@
+import json
+
+from hdx.utilities.path import temp_dir
+
+from hdx.scraper.hrp_projects.cache import CachingRetrieve, ResponseCache
+
+
+class Response:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+class Downloader:
+    """Stand in for Download returning queued responses"""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+
+    def setup(self, url, headers=None):
+        self.requests.append((url, headers))
+        response = self.responses.pop(0)
+        if callable(response):
+            return response()
+        return response
+
+
+class TestResponseCache:
+    def test_response_cache(self):
+        with temp_dir("test_response_cache") as tempdir:
+            downloader = Downloader()
+            cache = ResponseCache(tempdir, ttl=3600, max_size=20)
+            downloader.responses.append(Response(200, b'{"a": 1}', {"ETag": "x"}))
+            assert cache.download(downloader, "https://test/1") == b'{"a": 1}'
+            # fresh so no request made
+            assert cache.download(downloader, "https://test/1") == b'{"a": 1}'
+            assert len(downloader.requests) == 1
+            assert (cache.hits, cache.misses, cache.bytes_saved) == (1, 1, 8)
+            cache.save()
+
+            # stale so revalidated using ETag
+            cache = ResponseCache(tempdir, ttl=0, max_size=20)
+            downloader.responses.append(Response(304))
+            assert cache.download(downloader, "https://test/1") == b'{"a": 1}'
+            assert downloader.requests[-1] == (
+                "https://test/1",
+                {"If-None-Match": "x"},
+            )
+            assert cache.revalidations == 1
+
+            # least recently used response removed when too big
+            downloader.responses.append(Response(200, b'{"b": 22}'))
+            downloader.responses.append(Response(200, b'{"c": 333}'))
+            cache.download(downloader, "https://test/2")
+            cache.download(downloader, "https://test/3")
+            downloader.responses.append(Response(200, b'{"a": 2}'))
+            assert cache.download(downloader, "https://test/1") == b'{"a": 2}'
+            assert downloader.requests[-1] == ("https://test/1", None)
+
+            # response evicted by another thread while being revalidated
+            def evict_and_revalidate():
+                other_downloader = Downloader()
+                other_downloader.responses.append(Response(200, b'{"b": 22}'))
+                other_downloader.responses.append(Response(200, b'{"c": 333}'))
+                cache.download(other_downloader, "https://test/2")
+                cache.download(other_downloader, "https://test/3")
+                return Response(304)
+
+            downloader.responses.append(evict_and_revalidate)
+            downloader.responses.append(Response(200, b'{"a": 3}'))
+            assert cache.download(downloader, "https://test/1") == b'{"a": 3}'
+            assert downloader.requests[-1] == ("https://test/1", None)
+            assert cache.revalidations == 1
+            cache.log_statistics()
+
+    def test_caching_retrieve(self):
+        with temp_dir("test_caching_retrieve") as tempdir:
+            downloader = Downloader()
+            cache = ResponseCache(tempdir)
+            retriever = CachingRetrieve(
+                cache, downloader, tempdir, tempdir, tempdir, save=True, delete=False
+            )
+            downloader.responses.append(Response(200, b'{"data": [1, 2]}'))
+            assert retriever.download_json("https://test/plan") == {"data": [1, 2]}
+            clone = retriever.clone(Downloader())
+            assert clone.download_json("https://test/plan") == {"data": [1, 2]}
+            with open(f"{tempdir}/plan.json") as file:
+                assert json.load(file) == {"data": [1, 2]}
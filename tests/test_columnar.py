@@ -0,0 +1,88 @@
+from csv import DictReader
+from os.path import join
+from shutil import rmtree
+
+import pytest
+from hdx.api.utilities.hdx_error_handler import HDXErrorHandler
+from hdx.utilities.downloader import Download
+from hdx.utilities.path import temp_dir
+from hdx.utilities.retriever import Retrieve
+
+from hdx.scraper.hrp_projects.columnar import PARQUET_FILENAME, ProjectsDataset
+from hdx.scraper.hrp_projects.hrp_projects import HRPProjects
+from hdx.scraper.hrp_projects.state import PlanState
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+class TestColumnar:
+    def test_export(self, configuration, fixtures_dir, input_dir):
+        with HDXErrorHandler() as error_handler:
+            with temp_dir(
+                "test_columnar",
+                delete_on_success=True,
+                delete_on_failure=False,
+            ) as tempdir:
+                with Download(user_agent="test") as downloader:
+                    retriever = Retrieve(
+                        downloader=downloader,
+                        fallback_dir=tempdir,
+                        saved_dir=input_dir,
+                        temp_dir=tempdir,
+                        save=False,
+                        use_saved=True,
+                    )
+                    folder = join(tempdir, "projects_parquet")
+                    state_dir = join(tempdir, "state")
+
+                    def run(current_year):
+                        projects_dataset = ProjectsDataset(
+                            folder, configuration["headers"]
+                        )
+                        hrp_projects = HRPProjects(
+                            configuration,
+                            retriever,
+                            error_handler,
+                            tempdir,
+                            PlanState(state_dir),
+                            projects_dataset=projects_dataset,
+                        )
+                        hrp_projects.get_data(current_year, 2018)
+                        hrp_projects.save_state()
+                        return hrp_projects
+
+                    run(2022)
+                    path = join(
+                        folder, "plan_year=2022", "plan_code=RSYR22", PARQUET_FILENAME
+                    )
+                    table = pq.read_table(path)
+                    assert table.num_rows == 755
+                    assert table.column_names == configuration["headers"]
+                    schema = table.schema
+                    assert schema.field("locations").type == pa.list_(pa.string())
+                    assert schema.field("plans").type == pa.list_(pa.string())
+                    assert schema.field("currentRequestedFunds").type == pa.float64()
+                    # values are the same as in the CSV once lists are joined
+                    with open(
+                        join(fixtures_dir, "rsyr22-irq-projects.csv"),
+                        encoding="utf-8-sig",
+                        newline="",
+                    ) as file:
+                        csv_rows = list(DictReader(file))
+                    for row, csv_row in zip(table.to_pylist(), csv_rows):
+                        for header in ("locations", "globalClusters", "plans"):
+                            values = row[header] or ()
+                            assert ", ".join(values) == csv_row[header]
+                        funds = csv_row["currentRequestedFunds"]
+                        if funds:
+                            assert row["currentRequestedFunds"] == float(funds)
+                        assert row["Response plan code"] == "RSYR22"
+
+                    # stored plans are only used if they are in the export
+                    hrp_projects = run(2023)
+                    assert hrp_projects.skipped_plans == 1
+                    rmtree(folder)
+                    hrp_projects = run(2023)
+                    assert hrp_projects.skipped_plans == 0
+                    assert pq.read_table(path).num_rows == 755
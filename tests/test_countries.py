@@ -0,0 +1,35 @@
+from os.path import join
+
+from hdx.location.country import Country
+from hdx.utilities.path import temp_dir
+
+from hdx.scraper.hrp_projects.countries import CountryMetadata
+
+
+class TestCountryMetadata:
+    def test_country_metadata(self, configuration):
+        country_metadata = CountryMetadata.from_country()
+        countries = Country.countriesdata()["countries"]
+        assert len(country_metadata.names) > 240
+        for iso3 in countries:
+            assert country_metadata.get_name(iso3) == (
+                Country.get_country_name_from_iso3(iso3)
+            )
+        assert country_metadata.flagged["HRP"] == {
+            iso3 for iso3, country in countries.items() if country["Has HRP"] == "Y"
+        }
+        assert country_metadata.flagged["GHO"] == {
+            iso3 for iso3, country in countries.items() if country["In GHO"] == "Y"
+        }
+
+        with temp_dir("test_country_metadata") as tempdir:
+            path = join(tempdir, "countries.json")
+            assert CountryMetadata.load(path) is None
+            country_metadata.save(path)
+            loaded = CountryMetadata.load(path)
+            assert loaded.names == country_metadata.names
+            assert loaded.flagged == country_metadata.flagged
+            assert CountryMetadata.load(path, max_age=0) is None
+            assert CountryMetadata.get(path).created == country_metadata.created
+            rebuilt = CountryMetadata.get(path, rebuild=True)
+            assert rebuilt.created > country_metadata.created
@@ -0,0 +1,25 @@
+from hdx.utilities.downloader import Download
+from hdx.utilities.path import temp_dir
+from hdx.utilities.retriever import Retrieve
+
+from hdx.scraper.hrp_projects.decode import JSONRetrieve
+
+
+class TestJSONRetrieve:
+    def test_download_json(self, configuration, input_dir):
+        with temp_dir("test_json_retrieve") as tempdir:
+            with Download(user_agent="test") as downloader:
+                retriever = Retrieve(
+                    downloader=downloader,
+                    fallback_dir=tempdir,
+                    saved_dir=input_dir,
+                    temp_dir=tempdir,
+                    save=False,
+                    use_saved=True,
+                )
+                json_retriever = JSONRetrieve.from_retriever(retriever, downloader)
+                assert json_retriever.use_saved is True
+                assert isinstance(json_retriever.clone(downloader), JSONRetrieve)
+                url = configuration["api_pattern"].format(code="RSYR22", rows=500)
+                url = f"{url}&page=8"
+                assert json_retriever.download_json(url) == retriever.download_json(url)
@@ -0,0 +1,39 @@
+import time
+
+from hdx.scraper.hrp_projects.fetch import PageFetcher
+
+
+class SlowRetrieve:
+    """Stand in for Retrieve where later pages return sooner"""
+
+    def __init__(self):
+        self.urls = []
+
+    def clone(self, downloader):
+        return self
+
+    def download_json(self, url):
+        page = int(url.split("page=")[1])
+        time.sleep(0.01 * (10 - page))
+        self.urls.append(url)
+        return {"page": page}
+
+
+class TestPageFetcher:
+    def test_iter_pages(self, configuration):
+        retriever = SlowRetrieve()
+        with PageFetcher(retriever, max_in_flight=4) as fetcher:
+            results = list(fetcher.iter_pages("https://test?limit=500", 8))
+        assert [result["page"] for result in results] == list(range(2, 9))
+        assert len(retriever.urls) == 7
+
+        retriever = SlowRetrieve()
+        with PageFetcher(retriever, max_in_flight=1) as fetcher:
+            results = list(fetcher.iter_pages("https://test?limit=500", 3))
+            assert results == [{"page": 2}, {"page": 3}]
+            # pages are requested in order with one page in flight
+            assert retriever.urls == [
+                "https://test?limit=500&page=2",
+                "https://test?limit=500&page=3",
+            ]
+            assert list(fetcher.iter_pages("https://test?limit=500", 1)) == []
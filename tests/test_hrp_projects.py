@@ -1,14 +1,59 @@
-from os.path import join
+import json
+import threading
+from glob import glob
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from math import ceil
+from os.path import basename, join
+from urllib.parse import parse_qs, urlsplit
 
 from hdx.api.utilities.hdx_error_handler import HDXErrorHandler
 from hdx.utilities.compare import assert_files_same
 from hdx.utilities.downloader import Download
+from hdx.utilities.loader import load_json
 from hdx.utilities.path import temp_dir
 from hdx.utilities.retriever import Retrieve
 
 from hdx.scraper.hrp_projects.hrp_projects import HRPProjects
 
 
+class HPCHandler(BaseHTTPRequestHandler):
+    """Serve plans and project searches limited to 100 projects per page"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/plan":
+            body = {"data": self.server.plans}
+        else:
+            query = parse_qs(url.query)
+            projects = self.server.projects[query["planCodes"][0]]
+            limit = min(int(query["limit"][0]), 100)
+            page = int(query.get("page", ["1"])[0])
+            results = projects[(page - 1) * limit : page * limit]
+            body = {
+                "data": {
+                    "results": results,
+                    "pagination": {
+                        "count": len(results),
+                        "total": len(projects),
+                        "limit": limit,
+                        "currentPage": page,
+                        "pages": ceil(len(projects) / limit),
+                    },
+                }
+            }
+        content = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
 class TestHRPProjects:
     def test_hrp_projects(self, configuration, fixtures_dir, input_dir, config_dir):
         with HDXErrorHandler() as error_handler:
@@ -31,6 +76,24 @@ class TestHRPProjects:
                     )
                     countryiso3s = hrp_projects.get_data(2022, 2018)
                     assert countryiso3s == ["EGY", "IRQ", "JOR", "LBN", "TUR"]
+                    # plan CSV is written once and shared by its 5 countries
+                    assert hrp_projects.rows_not_written == 755 * 4
+                    country = hrp_projects.countries["IRQ"]
+                    assert country.plan_codes == ["RSYR22"]
+                    assert country.plans[0].rows == 755
+                    report = hrp_projects.report.to_dict()
+                    assert report["plans"]["RSYR22"]["rows"] == 755
+                    assert report["plans"]["RSYR22"]["stages"]["page"]["count"] == 8
+                    assert report["countries"]["IRQ"]["rows"] == 755
+                    assert country.plans[0].iso3s == ("IRQ", "JOR", "EGY", "TUR", "LBN")
+                    assert hrp_projects.hrp_countries == set()
+                    assert hrp_projects.gho_countries == {
+                        "EGY",
+                        "IRQ",
+                        "JOR",
+                        "LBN",
+                        "TUR",
+                    }
                     edits = hrp_projects.check_hrp_gho(2022, flag=False)
                     assert len(edits) == 4
                     dataset = hrp_projects.generate_dataset("IRQ")
@@ -83,3 +146,116 @@ class TestHRPProjects:
                         join(fixtures_dir, "rsyr22-irq-projects.csv"),
                         join(tempdir, "rsyr22-irq-projects.csv"),
                     )
+
+    def test_check_plans(self, configuration, input_dir):
+        with HDXErrorHandler() as error_handler:
+            with temp_dir(
+                "test_check_plans",
+                delete_on_success=True,
+                delete_on_failure=False,
+            ) as tempdir:
+                with Download(user_agent="test") as downloader:
+                    retriever = Retrieve(
+                        downloader=downloader,
+                        fallback_dir=tempdir,
+                        saved_dir=input_dir,
+                        temp_dir=tempdir,
+                        save=False,
+                        use_saved=True,
+                    )
+                    hrp_projects = HRPProjects(
+                        configuration, retriever, error_handler, tempdir
+                    )
+                    plans = hrp_projects.check_plans(2022, 2018)
+                    assert [plan.code for plan in plans] == ["RSYR22"]
+                    # no projects are downloaded
+                    assert hrp_projects.countries == {}
+                    assert hrp_projects.gho_countries == {
+                        "EGY",
+                        "IRQ",
+                        "JOR",
+                        "LBN",
+                        "TUR",
+                    }
+                    edits = hrp_projects.check_hrp_gho(2022, flag=False)
+                    assert len(edits) == 4
+
+    def test_save_and_replay(self, configuration, input_dir):
+        # two copies of RSYR22 with different numbers of projects
+        template = next(
+            plan
+            for plan in load_json(join(input_dir, "public-plan.json"))["data"]
+            if plan["planVersion"]["code"] == "RSYR22"
+        )
+        projects = load_json(
+            join(
+                input_dir,
+                "project-search-plancodes-rsyr22-excludefields-governingentities-targets-limit-500.json",
+            )
+        )["data"]["results"]
+        server = ThreadingHTTPServer(("127.0.0.1", 0), HPCHandler)
+        server.plans = []
+        server.projects = {}
+        for code, rows in (("TSTA22", 100), ("TSTB22", 60)):
+            plan = json.loads(json.dumps(template))
+            plan["id"] = len(server.plans)
+            plan["planVersion"]["code"] = code
+            server.plans.append(plan)
+            server.projects[code] = [
+                {
+                    **project,
+                    "plans": [{**entry, "code": code} for entry in project["plans"]],
+                }
+                for project in projects[:rows]
+            ]
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        original = dict(configuration)
+        configuration["plans_url"] = f"{url}/plan"
+        configuration["api_pattern"] = f"{url}/search?planCodes={{code}}&limit={{rows}}"
+        try:
+            with HDXErrorHandler() as error_handler:
+                with temp_dir(
+                    "test_save_and_replay",
+                    delete_on_success=True,
+                    delete_on_failure=False,
+                ) as tempdir:
+                    saved_dir = join(tempdir, "saved_data")
+
+                    def run(save, max_concurrent_plans):
+                        configuration["max_concurrent_plans"] = max_concurrent_plans
+                        with Download(user_agent="test") as downloader:
+                            retriever = Retrieve(
+                                downloader=downloader,
+                                fallback_dir=tempdir,
+                                saved_dir=saved_dir,
+                                temp_dir=tempdir,
+                                save=save,
+                                use_saved=not save,
+                            )
+                            hrp_projects = HRPProjects(
+                                configuration, retriever, error_handler, tempdir
+                            )
+                            hrp_projects.get_data(2022, 2018)
+                        return {
+                            plan.code: plan.projects_fingerprint
+                            for plan in hrp_projects.countries["IRQ"].plans
+                        }
+
+                    # the page size stays the same after the API limits it so
+                    # every plan is saved with the same urls whatever the order
+                    # in which plans are downloaded
+                    saved = run(True, 1)
+                    assert sorted(
+                        basename(path) for path in glob(join(saved_dir, "search-*"))
+                    ) == [
+                        "search-plancodes-tsta22-limit-500.json",
+                        "search-plancodes-tstb22-limit-500.json",
+                    ]
+                    assert run(False, 2) == saved
+        finally:
+            server.shutdown()
+            server.server_close()
+            configuration.clear()
+            configuration.update(original)
@@ -0,0 +1,47 @@
+from os.path import join
+
+from hdx.utilities.loader import load_json
+from hdx.utilities.path import temp_dir
+
+from hdx.scraper.hrp_projects.instrumentation import RunReport, get_percentile
+
+
+class TestRunReport:
+    def test_report(self):
+        report = RunReport()
+        with report.time("download_plan", plan="HAFG23"):
+            pass
+        with report.time("download_plan", plan="HSDN23"):
+            pass
+        with report.time("download_plan", batch="HSYR23,HLBN23"):
+            pass
+        with report.time("generate_dataset", country="AFG"):
+            pass
+        report.add("rows", 10, plan="HAFG23")
+        report.add("rows", 5, plan="HSDN23")
+        report.add("bytes", 100, plan="HAFG23")
+        report.add("rows", 10, country="AFG")
+        report.add("bytes", 50, batch="HSYR23,HLBN23")
+        result = report.to_dict()
+        assert result["stages"]["download_plan"]["count"] == 3
+        assert result["stages"]["generate_dataset"]["count"] == 1
+        assert result["plans"]["HAFG23"]["rows"] == 10
+        assert result["plans"]["HAFG23"]["stages"]["download_plan"]["count"] == 1
+        assert result["countries"]["AFG"]["rows"] == 10
+        assert "HSYR23,HLBN23" not in result["plans"]
+        batch = result["batches"]["HSYR23,HLBN23"]
+        assert batch["bytes"] == 50
+        assert batch["stages"]["download_plan"]["count"] == 1
+        assert result["totals"] == {"rows": 15, "bytes": 150}
+        assert result["peak_rss"] > 0
+
+        with temp_dir("TestRunReport", delete_on_success=True) as folder:
+            path = join(folder, "run_report.json")
+            report.save(path)
+            assert load_json(path)["totals"] == {"rows": 15, "bytes": 150}
+
+    def test_get_percentile(self):
+        values = list(range(1, 101))
+        assert get_percentile(values, 50) == 50
+        assert get_percentile(values, 99) == 99
+        assert get_percentile([3], 90) == 3
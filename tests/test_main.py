@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+
+class TestMain:
+    def test_lazy_imports(self):
+        # importing the entry point does not load hdx-python-api,
+        # hdx-python-country or pyarrow
+        code = (
+            "import sys; import hdx.scraper.hrp_projects.__main__; "
+            "print(','.join(sorted(name for name in ("
+            "'hdx.api.configuration', 'hdx.data.dataset', 'hdx.data.user', "
+            "'hdx.location.country', 'hdx.facades.infer_arguments', 'pyarrow'"
+            ") if name in sys.modules)))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        )
+        assert result.stdout.strip() == ""
@@ -0,0 +1,33 @@
+from hdx.utilities.dateparse import parse_date
+
+from hdx.scraper.hrp_projects.model import CountryIndex, Plan
+
+
+def make_plan(code, start, end):
+    return Plan(
+        code=code,
+        name=code,
+        start=start,
+        end=end,
+        start_date=parse_date(start),
+        end_date=parse_date(end),
+        url="",
+        iso3s=("AFG",),
+        year=int(start[:4]),
+        is_hrp=True,
+        is_gho=True,
+        fingerprint="",
+    )
+
+
+class TestCountryIndex:
+    def test_add_plan(self):
+        country = CountryIndex("AFG")
+        assert country.start_date is None
+        country.add_plan(make_plan("HAFG23", "2023-01-01", "2023-12-31"))
+        country.add_plan(make_plan("HAFG21", "2021-01-01", "2021-12-31"))
+        country.add_plan(make_plan("HAFG22", "2022-01-01", "2022-12-31"))
+        assert country.plan_codes == ["HAFG23", "HAFG21", "HAFG22"]
+        assert country.start_date == parse_date("2021-01-01")
+        assert country.end_date == parse_date("2023-12-31")
+        assert country.plans[0].has_projects is False
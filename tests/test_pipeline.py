@@ -0,0 +1,36 @@
+import time
+
+import pytest
+
+from hdx.scraper.hrp_projects.pipeline import Pipeline, Stage
+
+
+def slow_double(x):
+    time.sleep(0.005 * (10 - x))
+    return x * 2
+
+
+def drop_odd(x):
+    if x % 2:
+        return None
+    return x
+
+
+def fail_on_five(x):
+    if x == 5:
+        raise ValueError("five")
+    return x
+
+
+class TestPipeline:
+    def test_pipeline(self):
+        pipeline = Pipeline(
+            (Stage("filter", drop_odd), Stage("double", slow_double, 4)),
+            queue_size=2,
+        )
+        assert list(pipeline.run(range(10))) == [0, 4, 8, 12, 16]
+        assert list(pipeline.run([])) == []
+
+        pipeline = Pipeline((Stage("fail", fail_on_five, 3),), queue_size=1)
+        with pytest.raises(ValueError):
+            list(pipeline.run(range(10)))
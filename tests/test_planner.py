@@ -0,0 +1,71 @@
+from hdx.utilities.dateparse import parse_date
+
+from hdx.scraper.hrp_projects.model import Plan
+from hdx.scraper.hrp_projects.planner import PageSizer, batch_plans, split_projects
+
+
+def make_plan(code):
+    return Plan(
+        code=code,
+        name=code,
+        start="2023-01-01",
+        end="2023-12-31",
+        start_date=parse_date("2023-01-01"),
+        end_date=parse_date("2023-12-31"),
+        url="",
+        iso3s=("AFG",),
+        year=2023,
+        is_hrp=True,
+        is_gho=True,
+        fingerprint="",
+    )
+
+
+class TestPlanner:
+    def test_batch_plans(self):
+        plans = [make_plan(code) for code in ("A", "B", "C", "D", "E")]
+        previous_rows = {"A": 0, "B": 5, "C": 5000, "E": 100}
+        batches = batch_plans(plans, 2, 100, previous_rows.get)
+        assert [[plan.code for plan in batch] for batch in batches] == [
+            ["A", "B"],
+            ["C"],
+            ["D"],
+            ["E"],
+        ]
+        batches = batch_plans(plans, 1, 100, previous_rows.get)
+        assert len(batches) == 5
+
+    def test_split_projects(self):
+        projects = [
+            {"id": 1, "plans": [{"code": "A"}, {"code": "A"}]},
+            {"id": 2, "plans": [{"code": "B"}]},
+            {"id": 3, "plans": [{"code": "A"}, {"code": "B"}]},
+            {"id": 4, "plans": [{"code": "C"}]},
+        ]
+        split = split_projects(projects, ("A", "B"))
+        assert [project["id"] for project in split["A"]] == [1, 3]
+        assert [project["id"] for project in split["B"]] == [2, 3]
+
+    def test_page_sizer(self):
+        page_sizer = PageSizer(initial=500, minimum=100, maximum=1000, target_seconds=1)
+        assert page_sizer.limit == 500
+        page_sizer.observe(500, 2.0, None)
+        assert page_sizer.limit == 200
+        page_sizer = PageSizer(
+            initial=500,
+            minimum=100,
+            maximum=1000,
+            target_seconds=1,
+            target_bytes=300000,
+        )
+        page_sizer.observe(500, 0.1, 500000)
+        assert page_sizer.limit == 300
+        page_sizer.set_server_limit(100)
+        assert page_sizer.limit == 100
+        page_sizer.observe(100, 0.01, 1000)
+        assert page_sizer.limit == 100
+        page_sizer = PageSizer(initial=500, adaptive=False)
+        page_sizer.observe(500, 10, None)
+        assert page_sizer.limit == 500
+        page_sizer.set_server_limit(100)
+        assert page_sizer.limit == 500
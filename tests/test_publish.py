@@ -0,0 +1,53 @@
+from os.path import join
+
+from hdx.data.dataset import Dataset
+from hdx.data.resource import Resource
+from hdx.utilities.path import temp_dir
+
+from hdx.scraper.hrp_projects.publish import Publisher
+
+
+def make_dataset(folder, contents):
+    dataset = Dataset({"name": "hrp-projects-irq", "title": "Iraq"})
+    for name, content in contents.items():
+        path = join(folder, name)
+        with open(path, "w") as file:
+            file.write(content)
+        resource = Resource({"name": name, "description": name, "format": "csv"})
+        resource.set_file_to_upload(path)
+        dataset.add_update_resource(resource)
+    return dataset
+
+
+class TestPublisher:
+    def test_publish(self, configuration):
+        with temp_dir("TestPublisher", delete_on_success=True) as folder:
+            created = []
+            path = join(folder, "state", "published.json")
+            contents = {"a.csv": "a,b\r\n1,2\r\n", "b.csv": "a,b\r\n3,4\r\n"}
+            publisher = Publisher(path, created.append)
+            assert publisher.publish(make_dataset(folder, contents)) is True
+            assert len(created) == 1
+            assert publisher.changed_resources == 2
+
+            # hashes are kept between runs
+            publisher = Publisher(path, created.append)
+            assert publisher.publish(make_dataset(folder, contents)) is False
+            assert len(created) == 1
+            assert publisher.unchanged == 1
+
+            contents["b.csv"] = "a,b\r\n3,45\r\n"
+            assert publisher.publish(make_dataset(folder, contents)) is True
+            assert len(created) == 2
+            assert publisher.changed_resources == 1
+            assert publisher.unchanged_resources == 3
+
+            # metadata changes are published too
+            dataset = make_dataset(folder, contents)
+            dataset["title"] = "Iraq projects"
+            assert publisher.publish(dataset) is True
+            assert len(created) == 3
+
+            publisher = Publisher(path, created.append, full_refresh=True)
+            assert publisher.publish(make_dataset(folder, contents)) is True
+            assert len(created) == 4
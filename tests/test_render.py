@@ -0,0 +1,60 @@
+from filecmp import cmp
+from os.path import join
+
+from hdx.api.utilities.hdx_error_handler import HDXErrorHandler
+from hdx.utilities.compare import assert_files_same
+from hdx.utilities.downloader import Download
+from hdx.utilities.loader import load_json
+from hdx.utilities.path import temp_dir
+from hdx.utilities.retriever import Retrieve
+
+from hdx.scraper.hrp_projects.hrp_projects import HRPProjects
+from hdx.scraper.hrp_projects.render import CSVRenderer
+
+
+class TestCSVRenderer:
+    def test_render(self, configuration, input_dir):
+        projects = load_json(
+            join(
+                input_dir,
+                "project-search-plancodes-rsyr22-excludefields-governingentities-targets-limit-500.json",
+            )
+        )["data"]["results"]
+        headers = configuration["headers"]
+        with CSVRenderer(headers) as renderer:
+            expected = renderer.render("RSYR22", projects)
+        with CSVRenderer(headers, processes=2) as renderer:
+            assert renderer.render("RSYR22", projects) == expected
+            futures = [renderer.submit("RSYR22", projects) for _ in range(3)]
+            assert [future.result() for future in futures] == [expected] * 3
+            assert renderer.render("RSYR22", []) == ""
+
+    def test_render_processes(self, configuration, fixtures_dir, input_dir):
+        configuration["render_processes"] = 2
+        try:
+            with HDXErrorHandler() as error_handler:
+                with temp_dir(
+                    "test_render_processes",
+                    delete_on_success=True,
+                    delete_on_failure=False,
+                ) as tempdir:
+                    with Download(user_agent="test") as downloader:
+                        retriever = Retrieve(
+                            downloader=downloader,
+                            fallback_dir=tempdir,
+                            saved_dir=input_dir,
+                            temp_dir=tempdir,
+                            save=False,
+                            use_saved=True,
+                        )
+                        hrp_projects = HRPProjects(
+                            configuration, retriever, error_handler, tempdir
+                        )
+                        hrp_projects.get_data(2022, 2018)
+                        assert hrp_projects.countries["IRQ"].plans[0].rows == 755
+                        expected = join(fixtures_dir, "rsyr22-irq-projects.csv")
+                        actual = join(tempdir, "rsyr22-irq-projects.csv")
+                        assert_files_same(expected, actual)
+                        assert cmp(expected, actual, shallow=False)
+        finally:
+            del configuration["render_processes"]
@@ -0,0 +1,82 @@
+import pytest
+from hdx.utilities.base_downloader import DownloadError
+from requests import HTTPError, Response
+
+from hdx.scraper.hrp_projects.resilience import (
+    CircuitOpenError,
+    RetryPolicy,
+    is_retriable,
+)
+
+
+def make_error(status=None):
+    try:
+        if status is None:
+            raise ConnectionError("Connection reset")
+        response = Response()
+        response.status_code = status
+        raise HTTPError(f"{status} error", response=response)
+    except Exception as cause:
+        try:
+            raise DownloadError("Download failed!") from cause
+        except DownloadError as error:
+            return error
+
+
+class TestResilience:
+    def test_is_retriable(self):
+        assert is_retriable(make_error()) is True
+        assert is_retriable(make_error(503)) is True
+        assert is_retriable(make_error(429)) is True
+        assert is_retriable(make_error(404)) is False
+        assert is_retriable(ValueError("Not a download error")) is False
+
+    def test_retry(self):
+        policy = RetryPolicy(retries=3, backoff_seconds=0)
+        calls = []
+
+        def flaky(value):
+            calls.append(value)
+            if len(calls) < 3:
+                raise make_error(503)
+            return value
+
+        assert policy.call(flaky, "ok") == "ok"
+        assert len(calls) == 3
+        assert policy.retried == 2
+
+        calls = []
+        policy = RetryPolicy(retries=1, backoff_seconds=0)
+        with pytest.raises(DownloadError):
+            policy.call(flaky, "ok")
+        assert len(calls) == 2
+
+        def not_found():
+            calls.append(None)
+            raise make_error(404)
+
+        calls = []
+        with pytest.raises(DownloadError):
+            policy.call(not_found)
+        assert len(calls) == 1
+
+    def test_circuit_breaker(self):
+        policy = RetryPolicy(
+            retries=5, backoff_seconds=0, breaker_failures=2, breaker_reset_seconds=60
+        )
+
+        def failing():
+            raise make_error(503)
+
+        with pytest.raises(CircuitOpenError):
+            policy.call(failing)
+        assert policy.circuit_breaker.is_open is True
+        with pytest.raises(CircuitOpenError):
+            policy.call(lambda: "ok")
+
+        # a trial request is allowed once reset_seconds have passed
+        policy = RetryPolicy(breaker_failures=1, breaker_reset_seconds=0)
+        policy.circuit_breaker.record_failure()
+        assert policy.circuit_breaker.is_open is True
+        assert policy.call(lambda: "ok") == "ok"
+        assert policy.circuit_breaker.is_open is False
@@ -0,0 +1,84 @@
+from os import listdir
+from os.path import join
+
+from hdx.api.utilities.hdx_error_handler import HDXErrorHandler
+from hdx.utilities.compare import assert_files_same
+from hdx.utilities.downloader import Download
+from hdx.utilities.path import temp_dir
+from hdx.utilities.retriever import Retrieve
+
+from hdx.scraper.hrp_projects.hrp_projects import HRPProjects
+from hdx.scraper.hrp_projects.state import PlanState
+
+
+class TestPlanState:
+    def test_incremental(self, configuration, fixtures_dir, input_dir):
+        with HDXErrorHandler() as error_handler:
+            with temp_dir(
+                "test_plan_state",
+                delete_on_success=True,
+                delete_on_failure=False,
+            ) as tempdir:
+                with Download(user_agent="test") as downloader:
+                    retriever = Retrieve(
+                        downloader=downloader,
+                        fallback_dir=tempdir,
+                        saved_dir=input_dir,
+                        temp_dir=tempdir,
+                        save=False,
+                        use_saved=True,
+                    )
+                    state_dir = join(tempdir, "state")
+
+                    def run(current_year, full_refresh=False, fail=False):
+                        state = PlanState(state_dir, full_refresh=full_refresh)
+                        hrp_projects = HRPProjects(
+                            configuration, retriever, error_handler, tempdir, state
+                        )
+                        hrp_projects.get_data(current_year, 2018)
+                        if not fail:
+                            hrp_projects.save_state()
+                        return hrp_projects
+
+                    hrp_projects = run(2022)
+                    assert hrp_projects.skipped_plans == 0
+                    assert hrp_projects.unchanged_plans == 0
+
+                    # current year plans are downloaded but found to be unchanged
+                    hrp_projects = run(2022)
+                    assert hrp_projects.skipped_plans == 0
+                    assert hrp_projects.unchanged_plans == 1
+
+                    # past year plans are not downloaded
+                    hrp_projects = run(2023)
+                    assert hrp_projects.skipped_plans == 1
+                    assert hrp_projects.unchanged_plans == 1
+                    assert_files_same(
+                        join(fixtures_dir, "rsyr22-irq-projects.csv"),
+                        join(tempdir, "rsyr22-irq-projects.csv"),
+                    )
+
+                    hrp_projects = run(2023, full_refresh=True)
+                    assert hrp_projects.skipped_plans == 0
+
+                    # plans downloaded in a failed run are resumed from checkpoint
+                    # except in a full refresh
+                    hrp_projects = run(2022, full_refresh=True, fail=True)
+                    assert hrp_projects.resumed_plans == 0
+                    hrp_projects = run(2022, full_refresh=True, fail=True)
+                    assert hrp_projects.resumed_plans == 0
+                    hrp_projects = run(2022)
+                    assert hrp_projects.resumed_plans == 1
+                    assert hrp_projects.countries["IRQ"].plans[0].rows == 755
+                    assert_files_same(
+                        join(fixtures_dir, "rsyr22-irq-projects.csv"),
+                        join(tempdir, "rsyr22-irq-projects.csv"),
+                    )
+                    hrp_projects = run(2022)
+                    assert hrp_projects.resumed_plans == 0
+
+                    # stored CSVs of plans before the cutoff year are removed
+                    assert listdir(join(state_dir, "csv")) == ["rsyr22-projects.csv"]
+                    state = PlanState(state_dir)
+                    state.save()
+                    assert listdir(join(state_dir, "csv")) == []
@@ -0,0 +1,31 @@
+from hdx.scraper.hrp_projects.transform import RowTransformer
+
+
+class TestRowTransformer:
+    def test_transform(self):
+        transformer = RowTransformer(
+            ["name", "missing", "locations", "plans", "Response plan code"]
+        )
+        rows = [
+            {
+                "name": "Project 1",
+                "locations": [{"iso3": "IRQ"}, {"iso3": None}, {"iso3": "JOR"}],
+                "plans": [{"name": "B"}, {"name": "A"}, {"name": "B"}],
+            },
+            {"name": "Project 2", "locations": None, "plans": None},
+        ]
+        assert list(transformer.transform("RSYR22", rows)) == [
+            ("Project 1", None, "IRQ, JOR", "B, A", "RSYR22"),
+            ("Project 2", None, None, None, "RSYR22"),
+        ]
+        transformer = RowTransformer(["name", "globalClusters", "organizations"])
+        rows = [
+            {
+                "name": "Project 1",
+                "globalClusters": [{"name": "Health"}, {"name": "Education"}],
+                "organizations": [{"name": "Org"}],
+            }
+        ]
+        assert list(transformer.transform("RSYR22", rows)) == [
+            ("Project 1", "Health, Education", "Org")
+        ]